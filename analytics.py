@@ -0,0 +1,242 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Totals:
+    """
+    Running totals of a rollup.
+
+    Attributes:
+        purchases (int): Number of purchases.
+        units (float): Units sold.
+        revenue (float): Money taken.
+        discount (float): Money taken off by promotions.
+    """
+
+    __slots__ = ("purchases", "units", "revenue", "discount")
+
+    def __init__(self):
+        self.purchases = 0
+        self.units = 0.0
+        self.revenue = 0.0
+        self.discount = 0.0
+
+
+    def add(self, units, revenue, discount):
+        """
+        Add a purchase to the totals.
+        """
+        self.purchases += 1
+        self.units += units
+        self.revenue += revenue
+        self.discount += discount
+
+
+    def merge(self, other):
+        """
+        Add another Totals to these totals.
+        """
+        self.purchases += other.purchases
+        self.units += other.units
+        self.revenue += other.revenue
+        self.discount += other.discount
+
+
+    def __repr__(self):
+        return (f"Totals(purchases={self.purchases}, units={self.units}, "
+                f"revenue={self.revenue}, discount={self.discount})")
+
+
+
+
+class TimeBuckets:
+    """
+    Fixed-size ring buffer of Totals per time bucket. A slot is reused, and reset, when
+    the ring comes round to it again, so only the latest `size` buckets are kept.
+    """
+
+    def __init__(self, width, size):
+        """
+        Initialize a TimeBuckets ring.
+
+        Args:
+            width (float): Seconds per bucket.
+            size (int): Number of buckets kept.
+
+        Raises:
+            ValueError: If width or size is not positive.
+        """
+        if width <= 0 or size <= 0:
+            raise ValueError("Width and size must be greater than zero.")
+        self.width = width
+        self.size = size
+        self._buckets = [-1] * size
+        self._totals = [Totals() for _ in range(size)]
+
+
+    def _slot(self, bucket) -> int:
+        slot = bucket % self.size
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            self._totals[slot] = Totals()
+        return slot
+
+
+    def add(self, when, units, revenue, discount):
+        """
+        Add a purchase made at a given time.
+        """
+        slot = self._slot(int(when // self.width))
+        self._totals[slot].add(units, revenue, discount)
+
+
+    def last(self, now, count) -> List[Tuple[float, Totals]]:
+        """
+        Returns the totals of the latest buckets, oldest first.
+
+        Args:
+            now (float): The current time.
+            count (int): The number of buckets, at most `size`.
+
+        Returns:
+            List[Tuple[float, Totals]]: (bucket start time, totals) pairs. Empty buckets have zero totals.
+        """
+        current = int(now // self.width)
+        result = []
+        for bucket in range(current - min(count, self.size) + 1, current + 1):
+            slot = bucket % self.size
+            totals = self._totals[slot] if self._buckets[slot] == bucket else Totals()
+            result.append((bucket * self.width, totals))
+        return result
+
+
+
+
+class SalesAnalytics:
+    """
+    Streaming sales rollups fed by the "purchase" events of a ChangeFeed.
+
+    Every purchase updates per-product and per-promotion totals and per-minute and per-hour
+    ring buffers once. Queries read these pre-aggregates and never replay orders. Memory is
+    bounded by the catalog size, the number of promotions and the fixed ring sizes.
+    """
+
+    def __init__(self, feed=None, minutes=120, hours=48, clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize a SalesAnalytics.
+
+        Args:
+            feed (ChangeFeed): The feed to subscribe to, or None to call `record` directly.
+            minutes (int): Number of per-minute buckets kept.
+            hours (int): Number of per-hour buckets kept.
+            clock (Callable[[], float]): The time source. Defaults to `time.time`.
+        """
+        self._clock = clock or time.time
+        self._total = Totals()
+        self._products: Dict[str, Totals] = {}
+        self._promotions: Dict[str, Totals] = {}
+        self._minutes = TimeBuckets(60, minutes)
+        self._hours = TimeBuckets(3600, hours)
+        self._unsubscribe = feed.subscribe(self._on_event, replay=False) if feed is not None else None
+
+
+    def _on_event(self, event):
+        if event.field == "purchase":
+            self.record(event.name, event.value)
+
+
+    def record(self, name, purchase):
+        """
+        Add a completed purchase to every rollup.
+
+        Args:
+            name (str): The product name.
+            purchase (Purchase): The purchase.
+        """
+        now = self._clock()
+        units, revenue, discount = purchase.quantity, purchase.total_price, purchase.discount
+        self._total.add(units, revenue, discount)
+        self._products.setdefault(name, Totals()).add(units, revenue, discount)
+        for promotion, promotion_discount in purchase.promotions:
+            self._promotions.setdefault(promotion, Totals()).add(units, revenue, promotion_discount)
+        self._minutes.add(now, units, revenue, discount)
+        self._hours.add(now, units, revenue, discount)
+
+
+    def total(self) -> Totals:
+        """
+        Returns:
+            Totals: The totals of all purchases.
+        """
+        return self._total
+
+
+    def by_product(self, name=None):
+        """
+        Returns the totals of one product, or of every product.
+
+        Args:
+            name (str): The product name, or None for all products.
+
+        Returns:
+            Totals or Dict[str, Totals]: The product totals.
+        """
+        if name is None:
+            return dict(self._products)
+        return self._products.get(name, Totals())
+
+
+    def by_promotion(self, name=None):
+        """
+        Returns the totals of the purchases a promotion applied to, or of every promotion.
+        The discount of each promotion is its own share of the purchase discount.
+
+        Args:
+            name (str): The promotion name, or None for all promotions.
+
+        Returns:
+            Totals or Dict[str, Totals]: The promotion totals.
+        """
+        if name is None:
+            return dict(self._promotions)
+        return self._promotions.get(name, Totals())
+
+
+    def per_minute(self, count=60) -> List[Tuple[float, Totals]]:
+        """
+        Returns:
+            List[Tuple[float, Totals]]: The totals of the latest `count` minutes, oldest first.
+        """
+        return self._minutes.last(self._clock(), count)
+
+
+    def per_hour(self, count=24) -> List[Tuple[float, Totals]]:
+        """
+        Returns:
+            List[Tuple[float, Totals]]: The totals of the latest `count` hours, oldest first.
+        """
+        return self._hours.last(self._clock(), count)
+
+
+    def window(self, minutes) -> Totals:
+        """
+        Returns the combined totals of the latest minutes.
+
+        Args:
+            minutes (int): The number of minutes, at most the per-minute ring size.
+
+        Returns:
+            Totals: The combined totals.
+        """
+        combined = Totals()
+        for _, totals in self.per_minute(minutes):
+            combined.merge(totals)
+        return combined
+
+
+    def close(self):
+        """
+        Stop listening to the feed.
+        """
+        if self._unsubscribe is not None:
+            self._unsubscribe()
@@ -0,0 +1,96 @@
+"""
+Contention benchmark: a single-lock stock counter against a striped one.
+
+Two workloads hit the same hot product from every thread, the way the "Shipping" product
+is hit by nearly every order:
+    - raw: each thread takes and returns one unit of the counter directly.
+    - orders: each thread pushes single-line orders through `Store.order_stream`.
+
+Usage:
+    python bench_counters.py [threads] [operations per thread] [stripes]
+"""
+import sys
+import threading
+import time
+
+from counters import LockedCounter, StripedCounter
+from product import LimitedProduct
+from store import Store
+
+
+def run(counter, threads, operations):
+    """
+    Hammer a counter from several threads.
+
+    Returns:
+        float: Operations per second across all threads.
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(operations):
+            if counter.take(1):
+                counter.put(1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * operations / elapsed
+
+
+def run_orders(counter, threads, operations):
+    """
+    Push single-line orders for one hot product through `Store.order_stream` from several threads.
+
+    Returns:
+        float: Orders per second across all threads.
+    """
+    shipping = LimitedProduct("Shipping", price=10, quantity=0, maximum=1)
+    shipping.use_counter(counter)
+    store = Store([shipping])
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in store.order_stream([(shipping, 1)] for _ in range(operations)):
+            pass
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * operations / elapsed
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    stripes = int(sys.argv[3]) if len(sys.argv) > 3 else threads
+
+    locked = run(LockedCounter(10_000), threads, operations)
+    striped = run(StripedCounter(10_000, stripes=stripes), threads, operations)
+    print(f"threads={threads} operations/thread={operations} stripes={stripes}")
+    print("raw counter:")
+    print(f"single lock: {locked:,.0f} ops/s")
+    print(f"striped:     {striped:,.0f} ops/s ({striped / locked:.2f}x)")
+
+    stock = threads * operations + 1
+    locked = run_orders(LockedCounter(stock), threads, operations)
+    striped = run_orders(StripedCounter(stock, stripes=stripes), threads, operations)
+    print("order_stream:")
+    print(f"single lock: {locked:,.0f} orders/s")
+    print(f"striped:     {striped:,.0f} orders/s ({striped / locked:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of the idempotency-key dedup cache: lookup cost and memory at large key counts.
+
+Every key holds the payload `Store.order` stores: the order lines, a tuple of
+(Product, quantity) tuples, and the total.
+
+Usage:
+    python bench_dedup.py [keys] [--bloom]
+"""
+import sys
+import time
+import tracemalloc
+
+from dedup import DedupCache
+from product import Product
+
+
+CATALOG = [Product(f"Product {index}", price=10 * (index + 1), quantity=10 ** 9) for index in range(20)]
+
+
+def order_result(index):
+    # What `Store.order` caches: (tuple(shopping_list), total), with 1 to 3 fresh line tuples
+    lines = tuple((CATALOG[(index + line) % len(CATALOG)], line + 1) for line in range(index % 3 + 1))
+    return lines, float(sum(product.price * quantity for product, quantity in lines))
+
+
+def measure(keys, use_bloom):
+    """
+    Fill a cache with `keys` order results, then time hits and misses.
+
+    Returns:
+        dict: Nanoseconds per put, hit and miss, and the bytes per key held by the cache,
+              including the stored order lines but not the key strings or the products.
+    """
+    names = [f"order-{index:012d}" for index in range(keys)]
+    misses = [f"retry-{index:012d}" for index in range(min(keys, 1_000_000))]
+
+    results = [order_result(index) for index in range(keys)]
+    cache = DedupCache(max_entries=keys, use_bloom=use_bloom)
+    start = time.perf_counter()
+    for name, result in zip(names, results):
+        cache.put(name, result)
+    put = time.perf_counter() - start
+    del results
+
+    # Memory is measured on a second fill, so tracing does not slow the timed one
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    traced = DedupCache(max_entries=keys, use_bloom=use_bloom)
+    for index, name in enumerate(names):
+        traced.put(name, order_result(index))
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del traced
+
+    sample = names[::max(1, keys // len(misses))][:len(misses)]
+    start = time.perf_counter()
+    for name in sample:
+        cache.get(name)
+    hit = time.perf_counter() - start
+    start = time.perf_counter()
+    for name in misses:
+        cache.get(name)
+    miss = time.perf_counter() - start
+    return {
+        "put_ns": put / keys * 1e9,
+        "hit_ns": hit / len(sample) * 1e9,
+        "miss_ns": miss / len(misses) * 1e9,
+        "bytes_per_key": memory / keys,
+    }
+
+
+def main():
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    keys = int(arguments[0]) if arguments else 1_000_000
+    use_bloom = "--bloom" in sys.argv
+    result = measure(keys, use_bloom)
+    print(f"keys={keys:,} bloom={use_bloom}")
+    print(f"put:  {result['put_ns']:.0f} ns/op")
+    print(f"hit:  {result['hit_ns']:.0f} ns/op")
+    print(f"miss: {result['miss_ns']:.0f} ns/op")
+    print(f"memory: {result['bytes_per_key']:.0f} bytes/key ({result['bytes_per_key'] * keys / 2 ** 20:.0f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class ChangeEvent:
+    """
+    A single inventory change published on a ChangeFeed.
+
+    Attributes:
+        seq (int): Monotonic sequence number assigned by the feed.
+        name (str): The name of the product that changed.
+        field (str): What changed: "quantity", "price", "active", "added", "removed" or "purchase".
+        value: The new value. For "added" this is a product snapshot (dict), for "removed" it is None
+               and for "purchase" it is a Purchase.
+    """
+
+    __slots__ = ("seq", "name", "field", "value")
+
+    def __init__(self, seq, name, field, value):
+        self.seq = seq
+        self.name = name
+        self.field = field
+        self.value = value
+
+
+    def __repr__(self):
+        return f"ChangeEvent(seq={self.seq}, name={self.name!r}, field={self.field!r}, value={self.value!r})"
+
+
+
+
+class Purchase:
+    """
+    A completed purchase, published as the value of a "purchase" event.
+
+    Attributes:
+        quantity (float): The quantity bought.
+        total_price (float): The price paid.
+        discount (float): The total promotion discount.
+        promotions (tuple): (promotion name, discount) pairs of the promotions applied.
+    """
+
+    __slots__ = ("quantity", "total_price", "discount", "promotions")
+
+    def __init__(self, quantity, total_price, discount=0.0, promotions=()):
+        self.quantity = quantity
+        self.total_price = total_price
+        self.discount = discount
+        self.promotions = promotions
+
+
+    def __repr__(self):
+        return (f"Purchase(quantity={self.quantity!r}, total_price={self.total_price!r}, "
+                f"discount={self.discount!r}, promotions={self.promotions!r})")
+
+
+
+
+class ChangeFeed:
+    """
+    Ordered feed of stock, price and catalog changes emitted by Product and Store mutations.
+
+    Every event gets a sequence number. The feed keeps a full log of events and a
+    key-compacted view holding only the latest event per (product name, field), so a
+    late subscriber can catch up by replaying the compacted view instead of the full log.
+    "purchase" events describe sales rather than state, so they are never compacted.
+    Products are keyed by name, which is why a Store only attaches a feed to uniquely
+    named products.
+    """
+
+    def __init__(self, keep_log=True):
+        """
+        Initialize an empty ChangeFeed.
+
+        Args:
+            keep_log (bool): Keep the full, uncompacted event log. Disable it for long runs
+                             where only the compacted view is needed.
+        """
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._log: List[ChangeEvent] = []
+        self._keep_log = keep_log
+        self._compacted: Dict[str, Dict[str, ChangeEvent]] = {}  # name -> {field: latest event}
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+
+
+    @property
+    def last_seq(self) -> int:
+        """
+        Returns:
+            int: The sequence number of the most recent event, 0 if nothing was published.
+        """
+        return self._seq
+
+
+    def publish(self, name, field, value) -> ChangeEvent:
+        """
+        Publish a change, assign it the next sequence number and notify subscribers.
+
+        Args:
+            name (str): The name of the product that changed.
+            field (str): The kind of change.
+            value: The new value.
+
+        Returns:
+            ChangeEvent: The published event.
+        """
+        with self._lock:
+            self._seq += 1
+            event = ChangeEvent(self._seq, name, field, value)
+            if self._keep_log:
+                self._log.append(event)
+            self._compact(event)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
+        return event
+
+
+    def _compact(self, event):
+        if event.field == "purchase":
+            return
+        # An "added" snapshot or a "removed" tombstone supersedes every earlier key of the product
+        if event.field in ("added", "removed"):
+            self._compacted[event.name] = {event.field: event}
+        else:
+            self._compacted.setdefault(event.name, {})[event.field] = event
+
+
+    def subscribe(self, callback, replay=True) -> Callable[[], None]:
+        """
+        Register a callback that is called with every new ChangeEvent.
+
+        Args:
+            callback (Callable[[ChangeEvent], None]): The function to call for each event.
+            replay (bool): If True, the compacted view is replayed to the callback first,
+                           so it starts from the current state of the catalog.
+
+        Returns:
+            Callable[[], None]: A function that removes the subscription.
+        """
+        with self._lock:
+            backlog = self.compacted() if replay else []
+            self._subscribers.append(callback)
+        for event in backlog:
+            callback(event)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+
+    def events(self, since=0) -> List[ChangeEvent]:
+        """
+        Returns the full event log after a given sequence number.
+
+        Args:
+            since (int): Only events with a larger sequence number are returned.
+
+        Returns:
+            List[ChangeEvent]: The events in sequence order.
+        """
+        with self._lock:
+            if not self._keep_log:
+                raise ValueError("This feed does not keep a full log; use compacted() instead.")
+            # Sequence numbers are dense, so the log can be sliced directly
+            first = self._log[0].seq if self._log else 1
+            return self._log[max(since - first + 1, 0):]
+
+
+    def compacted(self, since=0) -> List[ChangeEvent]:
+        """
+        Returns the latest event per (product name, field), in sequence order.
+
+        Args:
+            since (int): Only events with a larger sequence number are returned.
+
+        Returns:
+            List[ChangeEvent]: The compacted events in sequence order.
+        """
+        with self._lock:
+            return sorted((event for fields in self._compacted.values() for event in fields.values()
+                           if event.seq > since),
+                          key=lambda event: event.seq)
+
+
+    def truncate(self, upto):
+        """
+        Drop full-log events up to and including a sequence number. The compacted view is kept.
+
+        Args:
+            upto (int): The last sequence number to drop.
+        """
+        with self._lock:
+            self._log = [event for event in self._log if event.seq > upto]
+
+
+
+
+def snapshot(product) -> dict:
+    """
+    Returns a plain snapshot of a product, used as the value of an "added" event.
+
+    Args:
+        product (Product): The product to snapshot.
+
+    Returns:
+        dict: The product type, name, price, quantity, maximum and active status.
+    """
+    return {
+        "type": type(product).__name__,
+        "name": product.name,
+        "price": product.price,
+        "quantity": product.quantity,
+        "maximum": getattr(product, "maximum", None),
+        "active": product.active,
+    }
+
+
+def apply_change(store, event, product_types: Optional[dict] = None):
+    """
+    Apply a ChangeEvent to a replica store, keeping it in sync incrementally.
+
+    The replica's products are updated in place without emitting output. Products are
+    matched by name; an "added" event creates a new product from its snapshot.
+
+    Args:
+        store (Store): The replica store.
+        event (ChangeEvent): The event to apply.
+        product_types (dict): Optional mapping of type name to class, used to build added products.
+    """
+    from product import Product, NonStockedProduct, LimitedProduct
+
+    if event.field == "added":
+        types = product_types or {cls.__name__: cls for cls in (Product, NonStockedProduct, LimitedProduct)}
+        data = event.value
+        cls = types.get(data["type"], Product)
+        if cls is NonStockedProduct:
+            product = cls(data["name"], data["price"])
+        elif data["maximum"] is not None:
+            product = cls(data["name"], data["price"], data["quantity"], data["maximum"])
+        else:
+            product = cls(data["name"], data["price"], data["quantity"])
+        product.active = data["active"]
+        existing = store.find_product(data["name"])
+        if existing is not None:
+            store.remove_product(existing)
+        store.add_product(product)
+        return
+
+    product = store.find_product(event.name)
+    if product is None:
+        return
+    if event.field == "removed":
+        store.remove_product(product)
+    elif event.field == "quantity":
+        product.quantity = event.value
+    elif event.field == "price":
+        product.price = event.value
+    elif event.field == "active":
+        product.active = event.value
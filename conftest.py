@@ -0,0 +1,18 @@
+import pytest
+
+
+class FakeClock:
+    """
+    Manually advanced time source for code that takes a `clock` callable.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
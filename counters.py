@@ -0,0 +1,225 @@
+import itertools
+import threading
+from typing import Optional
+
+
+class LockedCounter:
+    """
+    A stock counter guarded by a single lock. Every thread serializes on it.
+    `take` returns the exact stock left.
+    """
+
+    exact = True
+
+    def __init__(self, value):
+        """
+        Initialize a LockedCounter.
+
+        Args:
+            value (float): The initial stock.
+
+        Raises:
+            ValueError: If the value is negative or infinite.
+        """
+        if value < 0 or value == float('inf'):
+            raise ValueError("Counter value must be a finite, non-negative number.")
+        self._lock = threading.Lock()
+        self._value = float(value)
+
+
+    def take(self, amount) -> Optional[float]:
+        """
+        Take an amount of stock if enough is available.
+
+        Args:
+            amount (float): The amount to take.
+
+        Returns:
+            float or None: The stock left, or None if there was not enough stock.
+        """
+        with self._lock:
+            if self._value < amount:
+                return None
+            self._value -= amount
+            return self._value
+
+
+    def put(self, amount):
+        """
+        Return an amount of stock.
+
+        Args:
+            amount (float): The amount to add back.
+        """
+        with self._lock:
+            self._value += amount
+
+
+    def value(self) -> float:
+        """
+        Returns:
+            float: The current stock.
+        """
+        with self._lock:
+            return self._value
+
+
+    def set(self, value):
+        """
+        Replace the stock.
+
+        Args:
+            value (float): The new stock.
+        """
+        with self._lock:
+            self._value = float(value)
+
+
+
+
+class StripedCounter:
+    """
+    A stock counter split across N stripes for hot products.
+
+    Each thread is assigned a home stripe and draws from it under that stripe's lock only,
+    so threads buying the same product rarely contend. When a home stripe runs dry, the
+    stock of all stripes is pooled and spread evenly again. `value()` takes every stripe
+    lock in a fixed order and is therefore an exact global view.
+
+    The stripe counts and locks live in two preallocated lists (a fixed slab), so taking
+    stock never allocates. `take` only returns a lower bound of the stock left, so it is
+    not `exact`.
+    """
+
+    exact = False
+
+    def __init__(self, value, stripes=8):
+        """
+        Initialize a StripedCounter.
+
+        Args:
+            value (float): The initial stock.
+            stripes (int): The number of sub-counters.
+
+        Raises:
+            ValueError: If the value is negative or infinite, or if stripes is not positive.
+        """
+        if value < 0 or value == float('inf'):
+            raise ValueError("Counter value must be a finite, non-negative number.")
+        if stripes <= 0:
+            raise ValueError("Stripes must be greater than zero.")
+        self._stripes = int(stripes)
+        self._counts = [0.0] * self._stripes
+        self._locks = [threading.Lock() for _ in range(self._stripes)]
+        self._next_stripe = itertools.count()
+        self._home = threading.local()
+        self._spread(float(value))
+
+
+    @property
+    def stripes(self) -> int:
+        """
+        Returns:
+            int: The number of sub-counters.
+        """
+        return self._stripes
+
+
+    def _home_stripe(self) -> int:
+        # Threads are assigned home stripes round-robin on first use
+        index = getattr(self._home, "index", None)
+        if index is None:
+            index = next(self._next_stripe) % self._stripes
+            self._home.index = index
+        return index
+
+
+    def _spread(self, total):
+        # Distribute a total evenly; callers must hold every stripe lock (or own the counter)
+        share = total // self._stripes
+        for index in range(self._stripes):
+            self._counts[index] = share
+        self._counts[0] += total - share * self._stripes
+
+
+    def _acquire_all(self):
+        for lock in self._locks:
+            lock.acquire()
+
+
+    def _release_all(self):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+    def take(self, amount) -> Optional[float]:
+        """
+        Take an amount of stock if enough is available, rebalancing the stripes if needed.
+
+        The check and the take are one atomic step. Only the home stripe is locked unless
+        the take would empty it; then the stripes are pooled, so an exhausted stock is
+        always seen exactly.
+
+        Args:
+            amount (float): The amount to take.
+
+        Returns:
+            float or None: None if there was not enough stock in total. Otherwise a lower
+                           bound of the stock left, which is 0 only if the stock is exhausted.
+        """
+        index = self._home_stripe()
+        with self._locks[index]:
+            if self._counts[index] > amount:
+                self._counts[index] -= amount
+                return self._counts[index]
+        return self._rebalance_take(amount)
+
+
+    def _rebalance_take(self, amount) -> Optional[float]:
+        self._acquire_all()
+        try:
+            total = sum(self._counts)
+            if total < amount:
+                return None
+            self._spread(total - amount)
+            return total - amount
+        finally:
+            self._release_all()
+
+
+    def put(self, amount):
+        """
+        Return an amount of stock to the calling thread's home stripe.
+
+        Args:
+            amount (float): The amount to add back.
+        """
+        index = self._home_stripe()
+        with self._locks[index]:
+            self._counts[index] += amount
+
+
+    def value(self) -> float:
+        """
+        Returns:
+            float: The exact current stock across all stripes.
+        """
+        self._acquire_all()
+        try:
+            return sum(self._counts)
+        finally:
+            self._release_all()
+
+
+    def set(self, value):
+        """
+        Replace the stock and spread it evenly across the stripes.
+
+        Args:
+            value (float): The new stock.
+        """
+        self._acquire_all()
+        try:
+            self._spread(float(value))
+        finally:
+            self._release_all()
@@ -0,0 +1,166 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership filter. `might_contain` never misses a key that was added,
+    and wrongly reports about `error_rate` of other keys once `capacity` keys were added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Initialize a BloomFilter.
+
+        Args:
+            capacity (int): The number of keys the filter is sized for.
+            error_rate (float): The false positive rate at capacity.
+
+        Raises:
+            ValueError: If capacity is not positive or error_rate is not between 0 and 1.
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than zero.")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate must be between 0 and 1.")
+        self.capacity = capacity
+        self._bits_count = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._bits_count / capacity * math.log(2)))
+        self._bits = bytearray((self._bits_count + 7) // 8)
+        self.count = 0
+
+
+    def _positions(self, key):
+        first = hash(key)
+        second = hash((key, "bloom")) | 1
+        return [(first + index * second) % self._bits_count for index in range(self._hashes)]
+
+
+    def add(self, key):
+        """
+        Add a key.
+        """
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+    def might_contain(self, key) -> bool:
+        """
+        Returns:
+            bool: False if the key was definitely never added.
+        """
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+    def clear(self):
+        """
+        Remove every key.
+        """
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: The size of the bit array in bytes.
+        """
+        return len(self._bits)
+
+
+
+
+class DedupCache:
+    """
+    Bounded cache of order results by idempotency key.
+
+    Entries expire after `ttl` seconds, and the least recently used entry is evicted once
+    `max_entries` are held, so memory stays bounded. An optional Bloom filter answers most
+    lookups of new keys without touching the cache. Since a Bloom filter can not forget keys,
+    it is rebuilt from the live entries once it has seen twice its capacity. The rebuilt
+    filter replaces the old one in a single assignment, so a lookup running concurrently
+    never sees a partly filled filter.
+    """
+
+    def __init__(self, max_entries=100_000, ttl=86400.0, use_bloom=False,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize a DedupCache.
+
+        Args:
+            max_entries (int): The maximum number of keys held.
+            ttl (float): Seconds a result is kept.
+            use_bloom (bool): Front the cache with a Bloom filter.
+            clock (Callable[[], float]): The time source. Defaults to `time.monotonic`.
+
+        Raises:
+            ValueError: If max_entries or ttl is not positive.
+        """
+        if max_entries <= 0:
+            raise ValueError("Max entries must be greater than zero.")
+        if ttl <= 0:
+            raise ValueError("TTL must be greater than zero.")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock or time.monotonic
+        self._entries = OrderedDict()  # key -> (expires at, result), least recently used first
+        self._bloom = BloomFilter(max_entries) if use_bloom else None
+        self._lock = threading.Lock()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def get(self, key):
+        """
+        Returns the cached result of a key.
+
+        Args:
+            key (str): The idempotency key.
+
+        Returns:
+            The cached result, or None if the key is unknown or expired.
+        """
+        bloom = self._bloom
+        if bloom is not None and not bloom.might_contain(key):
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+
+    def put(self, key, result):
+        """
+        Cache the result of a key.
+
+        Args:
+            key (str): The idempotency key.
+            result: The result. None can not be cached.
+        """
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._bloom is not None:
+                if self._bloom.count >= 2 * self._bloom.capacity:
+                    # Built off to the side and swapped in, since `get` reads the filter without the lock
+                    bloom = BloomFilter(self._bloom.capacity)
+                    for live_key in self._entries:
+                        bloom.add(live_key)
+                    self._bloom = bloom
+                else:
+                    self._bloom.add(key)
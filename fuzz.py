@@ -0,0 +1,418 @@
+"""
+Differential fuzz harness for pricing and stock engines.
+
+Random catalogs and order streams are run against the reference object model
+(`Product.buy`, `LimitedProduct.buy`, `NonStockedProduct`, with totals priced by brute force
+from the promotions) and against an alternative engine. The first divergence is minimized
+and reported with its seed.
+
+Cases are independent and seeded, so large runs are sharded across processes with `--workers`.
+
+Usage:
+    python fuzz.py [--cases N] [--seed S] [--workers W] [--messages]
+"""
+import argparse
+import contextlib
+import itertools
+import multiprocessing
+import random
+import time
+from typing import Callable, List, Optional
+
+from product import Product, NonStockedProduct, LimitedProduct
+from promotion import Promotion, SecondHalfPrice, ThirdOneFree, PercentDiscount
+from store import Store
+from pipeline import (OrderPipeline, parse_stage, validate_stage, price_stage, reserve_stage,
+                      make_commit_stage, receipt_stage)
+
+
+class _Sink:
+    # Swallows the purchase summaries printed by the object model
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+_SINK = _Sink()
+
+
+def build_catalog(catalog) -> List[Product]:
+    """
+    Builds fresh products from a catalog spec.
+
+    Args:
+        catalog (List[dict]): Product specs as produced by `random_catalog`.
+
+    Returns:
+        List[Product]: The products, in spec order.
+    """
+    products = []
+    for spec in catalog:
+        if spec["type"] == "NonStockedProduct":
+            product = NonStockedProduct(spec["name"], spec["price"])
+        elif spec["type"] == "LimitedProduct":
+            product = LimitedProduct(spec["name"], spec["price"], spec["quantity"], spec["maximum"])
+        else:
+            product = Product(spec["name"], spec["price"], spec["quantity"])
+        for promotion in build_promotions(spec):
+            product.set_promotion(promotion)
+        products.append(product)
+    return products
+
+
+def build_promotions(spec) -> List[Promotion]:
+    """
+    Builds fresh promotions from a product spec.
+
+    Args:
+        spec (dict): A product spec as produced by `random_catalog`.
+
+    Returns:
+        List[Promotion]: The promotions, in spec order.
+    """
+    promotions = []
+    for kind, stackable, percent in spec["promotions"]:
+        if kind == "SecondHalfPrice":
+            promotions.append(SecondHalfPrice("Second Half price!", stackable))
+        elif kind == "ThirdOneFree":
+            promotions.append(ThirdOneFree("Third One Free!", stackable))
+        else:
+            promotions.append(PercentDiscount(f"{percent}% off!", percent, stackable))
+    return promotions
+
+
+class _Priced:
+    # Stand-in product with a given unit price, passed to `apply_promotion`
+    def __init__(self, price):
+        self.price = price
+
+
+def reference_price(product, spec, quantity) -> float:
+    """
+    Prices a quantity of a product by brute force, independently of `PromotionResolver`.
+
+    Every valid combination of the spec's promotions is tried: no promotion, each promotion
+    on its own and every set of two or more stackable promotions. The full price and single
+    promotions are priced exactly like `Product.buy` prices them, as `product.price * quantity`
+    and `promotion.apply_promotion(product, quantity)`. A set is applied one promotion at a
+    time, each to the unit price left by the ones before it. The cheapest total wins.
+
+    Args:
+        product (Product): The product, for its price.
+        spec (dict): The product spec the promotions are built from.
+        quantity (float): The quantity bought.
+
+    Returns:
+        float: The total price.
+    """
+    promotions = build_promotions(spec)
+    best = product.price * quantity
+    for promotion in promotions:
+        best = min(best, promotion.apply_promotion(product, quantity))
+    stackable = [promotion for promotion in promotions if promotion.stackable]
+    for size in range(2, len(stackable) + 1):
+        for combination in itertools.combinations(stackable, size):
+            unit_price = product.price
+            for promotion in combination:
+                unit_price = promotion.apply_promotion(_Priced(unit_price), quantity) / quantity
+            best = min(best, unit_price * quantity)
+    return float(best)
+
+
+def random_catalog(rng, max_products=6) -> List[dict]:
+    """
+    Generates a random catalog spec covering zero prices, empty and infinite stock,
+    `maximum` limits and every promotion type.
+
+    Args:
+        rng (random.Random): The random source.
+        max_products (int): The maximum number of products.
+
+    Returns:
+        List[dict]: The product specs.
+    """
+    catalog = []
+    for index in range(rng.randint(1, max_products)):
+        kind = rng.choice(("Product", "Product", "NonStockedProduct", "LimitedProduct"))
+        promotions = []
+        for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+            promotions.append((rng.choice(("SecondHalfPrice", "ThirdOneFree", "PercentDiscount")),
+                               rng.random() < 0.5, rng.choice((0, 10, 30, 50, 100))))
+        catalog.append({
+            "type": kind,
+            "name": f"P{index}",
+            "price": rng.choice((0, 1, 9.99, 10, 125, 1450)),
+            "quantity": rng.choice((0, 1, 2, 3, 5, 10, 50)),
+            "maximum": rng.choice((1, 2, 5)),
+            "promotions": promotions,
+        })
+    return catalog
+
+
+def random_orders(rng, catalog, max_orders=12, max_lines=3) -> List[list]:
+    """
+    Generates a random order stream for a catalog. Orders are lists of (product index, quantity).
+
+    Args:
+        rng (random.Random): The random source.
+        catalog (List[dict]): The catalog spec.
+        max_orders (int): The maximum number of orders.
+        max_lines (int): The maximum number of lines per order.
+
+    Returns:
+        List[list]: The orders.
+    """
+    orders = []
+    for _ in range(rng.randint(1, max_orders)):
+        orders.append([(rng.randrange(len(catalog)), rng.choice((-1, 0, 1, 1, 1, 2, 2, 3, 4, 6, 11)))
+                       for _ in range(rng.randint(1, max_lines))])
+    return orders
+
+
+def reference_engine(catalog, orders):
+    """
+    Runs an order stream through the reference object model.
+
+    Each order is atomic: its lines are bought with `Product.buy` and, if one fails, the
+    stock and status of every product is restored and the error is recorded. Totals come
+    from `reference_price`, not from the price returned by `buy`, so a pricing bug shared
+    by the object model and the candidate is still caught.
+
+    Returns:
+        Tuple[list, list]: Per order (True, total) or (False, error message), and the final
+                           (quantity, active) of every product.
+    """
+    products = build_catalog(catalog)
+    outcomes = []
+    with contextlib.redirect_stdout(_SINK):
+        for order in orders:
+            saved = [(product.quantity, product.active) for product in products]
+            try:
+                total = 0.0
+                for index, quantity in order:
+                    products[index].buy(quantity)
+                    total += reference_price(products[index], catalog[index], quantity)
+            except Exception as error:
+                for product, (quantity, active) in zip(products, saved):
+                    product.quantity = quantity
+                    product.active = active
+                outcomes.append((False, str(error)))
+                continue
+            outcomes.append((True, total))
+    return outcomes, [(product.quantity, product.active) for product in products]
+
+
+def make_pipeline_engine(batch_size=64) -> Callable:
+    """
+    Creates an engine that runs order streams through `Store.order_stream`.
+
+    Args:
+        batch_size (int): The pipeline batch size.
+
+    Returns:
+        Callable: The engine.
+    """
+    def pipeline_engine(catalog, orders):
+        products = build_catalog(catalog)
+        store = Store(products)
+        pipeline = OrderPipeline([parse_stage, validate_stage, price_stage, reserve_stage,
+                                  make_commit_stage(verbose=False), receipt_stage], batch_size)
+        shopping_lists = ([(products[index], quantity) for index, quantity in order] for order in orders)
+        outcomes = []
+        with contextlib.redirect_stdout(_SINK):
+            for receipt in store.order_stream(shopping_lists, pipeline):
+                outcomes.append((True, receipt.total) if receipt.ok else (False, str(receipt.error)))
+        return outcomes, [(product.quantity, product.active) for product in products]
+
+    return pipeline_engine
+
+
+
+
+class Divergence:
+    """
+    A case on which the candidate engine disagrees with the reference.
+
+    Attributes:
+        seed (int): The seed of the case.
+        catalog (List[dict]): The minimized catalog spec.
+        orders (List[list]): The minimized order stream.
+        expected: The reference result.
+        actual: The candidate result.
+    """
+
+    def __init__(self, seed, catalog, orders, expected, actual):
+        self.seed = seed
+        self.catalog = catalog
+        self.orders = orders
+        self.expected = expected
+        self.actual = actual
+
+
+    def __str__(self):
+        return (f"Divergence for seed {self.seed}\n"
+                f"catalog = {self.catalog!r}\n"
+                f"orders = {self.orders!r}\n"
+                f"reference: {self.expected!r}\n"
+                f"candidate: {self.actual!r}")
+
+
+
+
+def _stacks(catalog, orders) -> List[bool]:
+    # Per order, whether a line can be priced by a stack of promotions, whose totals may differ in rounding
+    return [any(len(catalog[index]["promotions"]) > 1 for index, _ in order) for order in orders]
+
+
+def _same(expected, actual, messages, stacks, tolerance=1e-9) -> bool:
+    expected_outcomes, expected_state = expected
+    actual_outcomes, actual_state = actual
+    if expected_state != actual_state or len(expected_outcomes) != len(actual_outcomes):
+        return False
+    for (expected_ok, expected_value), (actual_ok, actual_value), stacked in zip(expected_outcomes, actual_outcomes,
+                                                                                   stacks):
+        if expected_ok != actual_ok:
+            return False
+        if expected_ok:
+            if not stacked and expected_value != actual_value:
+                return False
+            if abs(expected_value - actual_value) > tolerance * max(1.0, abs(expected_value)):
+                return False
+        elif messages and expected_value != actual_value:
+            return False
+    return True
+
+
+def _drop_product(catalog, orders, removed):
+    # Removes an unused product and renumbers the order lines after it
+    catalog = catalog[:removed] + catalog[removed + 1:]
+    orders = [[(index - (index > removed), quantity) for index, quantity in order] for order in orders]
+    return catalog, orders
+
+
+def minimize(catalog, orders, diverges: Callable[[list, list], bool]):
+    """
+    Greedily shrinks a diverging case: drops orders, then lines, then lowers quantities,
+    then drops unused products and promotions, until no single step keeps the divergence.
+
+    Args:
+        catalog (List[dict]): The catalog spec.
+        orders (List[list]): The diverging order stream.
+        diverges (Callable[[list, list], bool]): Returns True if a (catalog, orders) case still diverges.
+
+    Returns:
+        Tuple[list, list]: The minimized catalog spec and order stream.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for index in range(len(orders)):
+            candidate = orders[:index] + orders[index + 1:]
+            if candidate and diverges(catalog, candidate):
+                orders, changed = candidate, True
+                break
+        if changed:
+            continue
+        for index, order in enumerate(orders):
+            for line in range(len(order)):
+                smaller = order[:line] + order[line + 1:]
+                candidate = orders[:index] + [smaller] + orders[index + 1:]
+                if smaller and diverges(catalog, candidate):
+                    orders, changed = candidate, True
+                    break
+                product, quantity = order[line]
+                if quantity > 1:
+                    lowered = order[:line] + [(product, quantity - 1)] + order[line + 1:]
+                    candidate = orders[:index] + [lowered] + orders[index + 1:]
+                    if diverges(catalog, candidate):
+                        orders, changed = candidate, True
+                        break
+            if changed:
+                break
+        if changed:
+            continue
+        used = {index for order in orders for index, _ in order}
+        for index in range(len(catalog)):
+            if index in used:
+                continue
+            candidate_catalog, candidate_orders = _drop_product(catalog, orders, index)
+            if diverges(candidate_catalog, candidate_orders):
+                catalog, orders, changed = candidate_catalog, candidate_orders, True
+                break
+        if changed:
+            continue
+        for index, spec in enumerate(catalog):
+            for promotion in range(len(spec["promotions"])):
+                smaller = dict(spec, promotions=spec["promotions"][:promotion] + spec["promotions"][promotion + 1:])
+                candidate = catalog[:index] + [smaller] + catalog[index + 1:]
+                if diverges(candidate, orders):
+                    catalog, changed = candidate, True
+                    break
+            if changed:
+                break
+    return catalog, orders
+
+
+def run(engine: Callable, cases=1000, seed=0, messages=False,
+        reference: Callable = reference_engine) -> Optional[Divergence]:
+    """
+    Runs seeded random cases against an engine and the reference.
+
+    Args:
+        engine (Callable): The candidate engine, called as `engine(catalog, orders)`.
+        cases (int): The number of cases.
+        seed (int): The seed of the first case. Case i uses seed `seed + i`.
+        messages (bool): Also require identical error messages, not only the same failures.
+        reference (Callable): The reference engine.
+
+    Returns:
+        Divergence or None: The first minimized divergence, or None if all cases agree.
+    """
+    def diverges(catalog, orders):
+        return not _same(reference(catalog, orders), engine(catalog, orders), messages, _stacks(catalog, orders))
+
+    for case_seed in range(seed, seed + cases):
+        rng = random.Random(case_seed)
+        catalog = random_catalog(rng)
+        orders = random_orders(rng, catalog)
+        if diverges(catalog, orders):
+            catalog, orders = minimize(catalog, orders, diverges)
+            return Divergence(case_seed, catalog, orders, reference(catalog, orders), engine(catalog, orders))
+    return None
+
+
+def _run_shard(batch_size, cases, seed, messages):
+    # Module-level so it can be sent to worker processes
+    return run(make_pipeline_engine(batch_size), cases, seed, messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the order pipeline against Product.buy.")
+    parser.add_argument("--cases", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--messages", action="store_true", help="also compare error messages")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        shard = -(-args.cases // args.workers)
+        shards = [(args.batch_size, min(shard, args.cases - offset), args.seed + offset, args.messages)
+                  for offset in range(0, args.cases, shard)]
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.starmap(_run_shard, shards)
+        divergence = next((result for result in results if result is not None), None)
+    else:
+        divergence = run(make_pipeline_engine(args.batch_size), args.cases, args.seed, args.messages)
+    elapsed = time.perf_counter() - start
+    if divergence is not None:
+        print(divergence)
+        raise SystemExit(1)
+    print(f"{args.cases} cases agree ({args.cases / elapsed:,.0f} cases/s)")
+
+
+if __name__ == '__main__':
+    main()
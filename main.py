@@ -1,6 +1,11 @@
+import argparse
+
 from product import Product, NonStockedProduct, LimitedProduct
 from store import Store
 from promotion import  SecondHalfPrice, ThirdOneFree, PercentDiscount
+from changefeed import ChangeFeed
+from popularity import PopularityTracker
+from profiling import profiled
 
 
 def get_user_input():
@@ -81,17 +86,20 @@ def menu_handler(choice, store):
         print("Invalid choice. Please try again.")  # Display an error message for invalid choices
 
 
-def choose_product(list_of_products):
+def choose_product(list_of_products, store=None):
     """
     Prompts the user to choose a product from a list.
 
     The function continuously asks the user to select a product by number from the list of available products.
     If the user enters a valid product number (between 1 and the length of the list), it returns the selected product.
+    If a store is given and the user enters text instead of a number, the store is searched by product name
+    and the user picks from the matches.
     If the input is invalid, the function will prompt the user again with an error message.
     If the user wants to finish the order, they can enter an empty string.
 
     Args:
         list_of_products (List[Product]): A list of available products to choose from.
+        store (Store): The store to search by name, or None to only allow choosing by number.
 
     Returns:
         Product or None: The selected product, or None if the user decides to finish the order by entering an empty string.
@@ -100,7 +108,10 @@ def choose_product(list_of_products):
 
         print("\nWhen you want to finish the order, enter an empty text.")
 
-        product_num = input("Which product # do you want to choose? ")
+        if store is None:
+            product_num = input("Which product # do you want to choose? ")
+        else:
+            product_num = input("Which product # do you want to choose? (or type a name to search) ")
 
         if product_num == "":
             return None  # User chooses to finish the order
@@ -112,7 +123,46 @@ def choose_product(list_of_products):
             else:
                 print("Error: Please enter a number between 1 and", len(list_of_products))
         except ValueError:
-            print("Error: Invalid input. Please enter a valid product number.")
+            if store is None:
+                print("Error: Invalid input. Please enter a valid product number.")
+                continue
+            product = search_product(store, product_num)
+            if product is not None:
+                return product
+
+
+def search_product(store, query):
+    """
+    Searches the store by product name and lets the user pick one of the matches.
+
+    Args:
+        store (Store): The store to search.
+        query (str): The search text, e.g. "pixel".
+
+    Returns:
+        Product or None: The selected product, or None if nothing matched or the user went back.
+    """
+    matches = store.search(query)
+    if not matches:
+        print(f"No products match '{query}'.")
+        return None
+    if len(matches) == 1:
+        print(f"Found: {matches[0]}")
+        return matches[0]
+
+    for number, product in enumerate(matches):
+        print(f"{number + 1}. {product}")
+    while True:
+        choice = input("Which match # do you want? (empty text to go back) ")
+        if choice == "":
+            return None
+        try:
+            choice = int(choice)
+            if 1 <= choice <= len(matches):
+                return matches[choice - 1]
+            print("Error: Please enter a number between 1 and", len(matches))
+        except ValueError:
+            print("Error: Invalid input. Please enter a valid match number.")
 
 
 def get_amount(amount):
@@ -122,17 +172,21 @@ def get_amount(amount):
     This function asks the user to input a number (integer) for the quantity of a product they wish to purchase.
     It checks if the entered amount is valid (i.e., a non-negative integer that does not exceed the available stock).
     If the input is invalid or exceeds the available stock, an error message is displayed, and the user is prompted again.
+    An empty entry goes back without choosing an amount.
 
     Args:
         amount (int): The available stock quantity for the product.
 
     Returns:
         int: The valid quantity of the product that the user wants to purchase.
-             It will be a value between 1 and the available stock (inclusive).
+             It will be a value between 1 and the available stock (inclusive), or 0 if the user went back.
     """
     while True:
         try:
-            product_amount = int(input(f"What amount do you want? (Available: {amount}): "))
+            product_amount = input(f"What amount do you want? (Available: {amount}, empty text to go back): ")
+            if product_amount == "":
+                return 0
+            product_amount = int(product_amount)
             if 0 < product_amount <= amount:
                 return product_amount
             else:
@@ -152,9 +206,9 @@ def make_an_order(store):
     The function does the following:
     1. Displays the list of available products.
     2. Prompts the user to select a product and specify the quantity.
-    3. Adds the selected product to the order if enough quantity is available.
+    3. Reserves the selected quantity for the cart if enough quantity is available.
     4. Continues the order process until the user opts to stop.
-    5. Displays the total payment for the order.
+    5. Buys the reserved items and displays the total payment for the order.
 
     Args:
         store (Store): The store instance from which products are ordered.
@@ -165,26 +219,38 @@ def make_an_order(store):
     list_all_products(store)  # Show available products
     print("----------")
     total_payment = 0.0
+    cart = []  # Reservation ids holding the stock of the cart
 
     while True:
-        product = choose_product(store.get_all_products())  # Let the user select a product
+        product = choose_product(store.get_all_products(), store)  # Let the user select a product
         if product is None:
             print("No valid product selected. Exiting order process.")
             break  # Exit if no valid product is selected
 
+        # The cart may already hold all the remaining stock of the product
+        if product.quantity <= 0:
+            print(f"No more stock of {product.name} is available.")
+            continue
+
         # Get the amount the user wants to buy
         amount = get_amount(product.quantity)
         if amount == 0:
-            print("Amount can't be zero. Please select a valid amount.")
-            continue  # Ask for input again if amount is zero
+            continue  # The user went back to choose another product
 
-        # Add to the total payment
+        # Hold the stock until the order is finished
         try:
-            total_payment += store.order([(product, amount)])  # Attempt the order
+            cart.append(store.reserve(product, amount))
         except Exception as e:
             print(f"An error occurred while processing your order: {e}")
             continue  # If there's an error, ask again
 
+    # Buy everything held for the cart
+    for reservation_id in cart:
+        try:
+            total_payment += store.confirm(reservation_id)
+        except Exception as e:
+            print(f"An error occurred while processing your order: {e}")
+
     # Final statement after order completion
     if total_payment > 0:
         print(f"Order complete! Total payment: ${total_payment:.2f}")
@@ -233,6 +299,10 @@ def start(store):
         print("----------")
 
 
+# Functions that block in input(); samples taken there are idle time
+PROMPT_FUNCTIONS = ("get_user_input", "choose_product", "search_product", "get_amount")
+
+
 menu_actions = {
     1: list_all_products,
     2: show_total_amount,
@@ -240,7 +310,12 @@ menu_actions = {
 }
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Best Buy store.")
+    parser.add_argument("--profile", nargs="?", const="profile.collapsed", metavar="PATH",
+                        help="sample the session and write collapsed stacks to PATH (default: profile.collapsed)")
+    args = parser.parse_args(argv)
+
     # setup initial stock of inventory
     product_list = [Product("MacBook Air M2", price=1450, quantity=100),
                     Product("Bose QuietComfort Earbuds", price=250, quantity=500),
@@ -261,7 +336,16 @@ def main():
     product_list[3].set_promotion(thirty_percent)
 
     best_buy = Store(product_list)
-    start(best_buy)
+    feed = ChangeFeed(keep_log=False)
+    best_buy.attach_feed(feed)
+    best_buy.popularity = PopularityTracker(feed)  # List best sellers first
+
+    if args.profile:
+        # Time spent waiting at the prompts is not part of the order path
+        with profiled(args.profile, idle=PROMPT_FUNCTIONS):
+            start(best_buy)
+    else:
+        start(best_buy)
 
 
 if __name__ == '__main__':
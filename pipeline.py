@@ -0,0 +1,271 @@
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class OrderLine:
+    """
+    A single (product, quantity) line of an order as it moves through the pipeline.
+
+    Attributes:
+        product (Product): The product being bought.
+        quantity (float): The quantity being bought.
+        price (float): The total price of the line, set by the price stage.
+        discount (float): The total promotion discount of the line, set by the price stage.
+        remaining (float): The stock left after the line, as returned by `Product.take_stock`.
+    """
+
+    __slots__ = ("product", "quantity", "price", "discount", "remaining")
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+        self.price = None
+        self.discount = 0.0
+        self.remaining = None
+
+
+
+
+class Order:
+    """
+    An order moving through the pipeline.
+
+    Attributes:
+        lines (List[OrderLine]): The order lines.
+        error (Exception): The first error that rejected the order, or None.
+        reserved (bool): True once the stock of all lines has been taken.
+        total (float): The total price of the order, set by the commit stage.
+    """
+
+    __slots__ = ("lines", "error", "reserved", "total")
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.error = None
+        self.reserved = False
+        self.total = 0.0
+
+
+
+
+class Receipt:
+    """
+    The result of an order, emitted by the last stage of the pipeline.
+
+    Attributes:
+        total (float): The total price paid, 0.0 for a rejected order.
+        lines (List[OrderLine]): The priced order lines.
+        error (Exception): The error that rejected the order, or None if it succeeded.
+    """
+
+    __slots__ = ("total", "lines", "error")
+
+    def __init__(self, total, lines, error=None):
+        self.total = total
+        self.lines = lines
+        self.error = error
+
+
+    @property
+    def ok(self) -> bool:
+        """
+        Returns:
+            bool: True if the order was completed.
+        """
+        return self.error is None
+
+
+
+
+def parse_stage(batch):
+    """
+    Turns shopping lists of (Product, quantity) tuples into Orders.
+
+    A shopping list containing anything other than tuples becomes an empty order,
+    matching the behaviour of `Store.order`.
+    """
+    orders = []
+    for shopping_list in batch:
+        if all(isinstance(item, tuple) for item in shopping_list):
+            orders.append(Order([OrderLine(product, quantity) for product, quantity in shopping_list]))
+        else:
+            orders.append(Order([]))
+    return orders
+
+
+def validate_stage(batch):
+    """
+    Rejects orders whose lines can not be bought, before any stock is touched.
+    """
+    for order in batch:
+        pending = {}
+        try:
+            for line in order.lines:
+                taken = pending.get(id(line.product), 0)
+                line.product.check_purchase(line.quantity, taken)
+                pending[id(line.product)] = taken + line.quantity
+        except Exception as error:
+            order.error = error
+    return batch
+
+
+def price_stage(batch):
+    """
+    Prices every line of the valid orders with its product's promotions.
+    """
+    for order in batch:
+        if order.error is None:
+            for line in order.lines:
+                line.price, line.discount = line.product.price_for(line.quantity)
+    return batch
+
+
+def reserve_stage(batch):
+    """
+    Takes the stock of every line. `take_stock` checks the stock atomically, so if a line no
+    longer fits, because an earlier order of the same batch or another thread took the stock,
+    the lines already taken are put back and the order is rejected.
+    """
+    for order in batch:
+        if order.error is not None:
+            continue
+        taken = []
+        try:
+            for line in order.lines:
+                line.remaining = line.product.take_stock(line.quantity)
+                taken.append(line)
+        except Exception as error:
+            for line in taken:
+                line.product.return_stock(line.quantity)
+            order.error = error
+            continue
+        order.reserved = True
+    return batch
+
+
+def make_commit_stage(verbose=True, journal: Optional[list] = None) -> Callable:
+    """
+    Creates a commit stage that completes the reserved purchases.
+
+    Args:
+        verbose (bool): Print the purchase summary of every line, like `Product.buy`.
+        journal (list): If given, every committed order is appended to it as a list of
+                        (product name, quantity, price) tuples before the purchase is completed.
+
+    Returns:
+        Callable: The commit stage.
+    """
+    def commit_stage(batch):
+        for order in batch:
+            if not order.reserved:
+                continue
+            if journal is not None:
+                journal.append([(line.product.name, line.quantity, line.price) for line in order.lines])
+            for line in order.lines:
+                line.product.complete_purchase(line.quantity, line.price, verbose, line.remaining)
+                order.total += line.price
+        return batch
+
+    return commit_stage
+
+
+def receipt_stage(batch):
+    """
+    Turns every order into a Receipt.
+    """
+    return [Receipt(order.total, order.lines, order.error) for order in batch]
+
+
+
+
+class OrderPipeline:
+    """
+    A streaming order pipeline: parse -> validate -> price -> reserve -> commit -> receipt.
+
+    Every stage is a function that takes a batch (list) and returns the batch for the next
+    stage, so any stage can be swapped, for example for a journaled commit stage. `run`
+    chains the stages as generators and pulls orders from the input in batches of
+    `batch_size`, so memory stays bounded for any stream length, and accumulates the time
+    spent in each stage in `timings`. `process` runs one batch straight through the stages,
+    which is the cheap path for single orders.
+    """
+
+    def __init__(self, stages: Optional[List[Callable]] = None, batch_size=64):
+        """
+        Initialize an OrderPipeline.
+
+        Args:
+            stages (List[Callable]): The stages, in order. Defaults to the standard verbose pipeline.
+            batch_size (int): The number of orders processed per batch.
+
+        Raises:
+            ValueError: If the batch size is not positive.
+        """
+        if batch_size <= 0:
+            raise ValueError("Batch size must be greater than zero.")
+        if stages is None:
+            stages = [parse_stage, validate_stage, price_stage, reserve_stage, make_commit_stage(), receipt_stage]
+        self.stages = stages
+        self.batch_size = batch_size
+        self._elapsed: List[float] = [0.0] * len(stages)
+
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: Seconds spent in each stage by `run`.
+        """
+        return {getattr(stage, "__name__", f"stage{index}"): self._elapsed[index]
+                for index, stage in enumerate(self.stages)}
+
+
+    def _timed(self, index, stage, batches):
+        for batch in batches:
+            start = time.perf_counter()
+            batch = stage(batch)
+            self._elapsed[index] += time.perf_counter() - start
+            yield batch
+
+
+    def _batched(self, shopping_lists):
+        iterator = iter(shopping_lists)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+    def process(self, shopping_lists: List) -> List[Receipt]:
+        """
+        Process one batch of shopping lists through every stage, without timing.
+
+        Args:
+            shopping_lists (List[List[Tuple[Product, int]]]): The orders to process.
+
+        Returns:
+            List[Receipt]: One receipt per order, in input order.
+        """
+        batch = shopping_lists
+        for stage in self.stages:
+            batch = stage(batch)
+        return batch
+
+
+    def run(self, shopping_lists: Iterable) -> Iterator[Receipt]:
+        """
+        Process a stream of shopping lists lazily.
+
+        Args:
+            shopping_lists (Iterable[List[Tuple[Product, int]]]): The orders to process.
+
+        Returns:
+            Iterator[Receipt]: One receipt per order, in input order.
+        """
+        stream = self._batched(shopping_lists)
+        for index, stage in enumerate(self.stages):
+            stream = self._timed(index, stage, stream)
+        for batch in stream:
+            yield from batch
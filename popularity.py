@@ -0,0 +1,228 @@
+import hashlib
+import heapq
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch. Estimates never undercount and overcount by at most
+    about e / width of the total weight, with probability 1 - e^-depth.
+    """
+
+    def __init__(self, width=1024, depth=4):
+        """
+        Initialize a CountMinSketch.
+
+        Args:
+            width (int): Counters per row.
+            depth (int): Number of rows (independent hash functions).
+
+        Raises:
+            ValueError: If width or depth is not positive.
+        """
+        if width <= 0 or depth <= 0:
+            raise ValueError("Width and depth must be greater than zero.")
+        self.width = width
+        self.depth = depth
+        self._rows = [[0.0] * width for _ in range(depth)]
+
+
+    def _columns(self, key):
+        # One 64-bit digest, split into two halves for double hashing
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        first, second = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+
+    def add(self, key, weight=1.0) -> float:
+        """
+        Add weight to a key.
+
+        Args:
+            key (str): The key.
+            weight (float): The weight to add.
+
+        Returns:
+            float: The new estimate of the key.
+        """
+        estimate = float('inf')
+        for row, column in zip(self._rows, self._columns(key)):
+            row[column] += weight
+            estimate = min(estimate, row[column])
+        return estimate
+
+
+    def estimate(self, key) -> float:
+        """
+        Returns:
+            float: The estimated weight of a key.
+        """
+        return min(row[column] for row, column in zip(self._rows, self._columns(key)))
+
+
+    def scale(self, factor):
+        """
+        Multiply every counter by a factor.
+
+        Args:
+            factor (float): The factor.
+        """
+        for row in self._rows:
+            for column in range(self.width):
+                row[column] *= factor
+
+
+
+
+class PopularityTracker:
+    """
+    Bounded-memory, time-decayed popularity of products, fed by "purchase" events of a ChangeFeed.
+
+    Units sold are counted in a count-min sketch, and the k most popular products are kept in
+    a min-heap. Decay uses forward decay: a sale at time t weighs 2^(t / half_life), so older
+    sales fade relative to new ones without touching every counter on each tick. When the
+    weights grow too large, the sketch and the heap are rescaled once.
+    """
+
+    _RESCALE_AT = 2.0 ** 64
+
+    def __init__(self, feed=None, k=20, half_life=3600.0, width=1024, depth=4,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize a PopularityTracker.
+
+        Args:
+            feed (ChangeFeed): The feed to subscribe to, or None to call `record` directly.
+            k (int): The number of hot products kept in the top-k heap.
+            half_life (float): Seconds after which a sale counts half as much.
+            width (int): Counters per sketch row.
+            depth (int): Sketch rows.
+            clock (Callable[[], float]): The time source. Defaults to `time.monotonic`.
+
+        Raises:
+            ValueError: If k or half_life is not positive.
+        """
+        if k <= 0:
+            raise ValueError("k must be greater than zero.")
+        if half_life <= 0:
+            raise ValueError("Half life must be greater than zero.")
+        self.k = k
+        self._half_life = half_life
+        self._clock = clock or time.monotonic
+        self._origin = self._clock()
+        self._sketch = CountMinSketch(width, depth)
+        self._top: Dict[str, float] = {}  # name -> score of the current top-k
+        self._heap: List = []  # (score, name), may hold stale entries
+        self._unsubscribe = feed.subscribe(self._on_event, replay=False) if feed is not None else None
+
+
+    def _on_event(self, event):
+        if event.field == "purchase":
+            self.record(event.name, event.value.quantity)
+        elif event.field == "removed":
+            self._top.pop(event.name, None)
+
+
+    def record(self, name, units=1.0):
+        """
+        Record a sale.
+
+        Args:
+            name (str): The product name.
+            units (float): The units sold.
+        """
+        weight = units * 2.0 ** ((self._clock() - self._origin) / self._half_life)
+        if weight > self._RESCALE_AT:
+            self._rescale()
+            weight = units * 2.0 ** ((self._clock() - self._origin) / self._half_life)
+        score = self._sketch.add(name, weight)
+        if name in self._top or len(self._top) < self.k:
+            self._push(name, score)
+            return
+        minimum = self._min_score()
+        if score > minimum:
+            self._evict_min()
+            self._push(name, score)
+
+
+    def _push(self, name, score):
+        self._top[name] = score
+        heapq.heappush(self._heap, (score, name))
+        # Drop stale entries once they outnumber the live ones
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(score, name) for name, score in self._top.items()]
+            heapq.heapify(self._heap)
+
+
+    def _min_score(self) -> float:
+        while self._heap:
+            score, name = self._heap[0]
+            if self._top.get(name) == score:
+                return score
+            heapq.heappop(self._heap)
+        return 0.0
+
+
+    def _evict_min(self):
+        self._min_score()
+        _, name = heapq.heappop(self._heap)
+        del self._top[name]
+
+
+    def _rescale(self):
+        now = self._clock()
+        factor = 2.0 ** (-(now - self._origin) / self._half_life)
+        self._origin = now
+        self._sketch.scale(factor)
+        self._top = {name: score * factor for name, score in self._top.items()}
+        self._heap = [(score, name) for name, score in self._top.items()]
+        heapq.heapify(self._heap)
+
+
+    def score(self, name) -> float:
+        """
+        Returns:
+            float: The decayed number of units sold recently, in units at the current time.
+        """
+        decay = 2.0 ** (-(self._clock() - self._origin) / self._half_life)
+        return self._sketch.estimate(name) * decay
+
+
+    def hottest(self) -> List[str]:
+        """
+        Returns:
+            List[str]: The names of the top-k products, most popular first.
+        """
+        return sorted(self._top, key=self._top.get, reverse=True)
+
+
+    def hot_first(self, products) -> list:
+        """
+        Orders products with the top-k hot products first and the rest in their original order.
+        Only the k hot products are sorted, never the full catalog.
+
+        Args:
+            products (List[Product]): The products.
+
+        Returns:
+            List[Product]: The reordered products.
+        """
+        rank = {name: index for index, name in enumerate(self.hottest())}
+        hot = [None] * len(rank)
+        cold = []
+        for product in products:
+            index = rank.pop(product.name, None)
+            if index is None:
+                cold.append(product)
+            else:
+                hot[index] = product
+        return [product for product in hot if product is not None] + cold
+
+
+    def close(self):
+        """
+        Stop listening to the feed.
+        """
+        if self._unsubscribe is not None:
+            self._unsubscribe()
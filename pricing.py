@@ -0,0 +1,163 @@
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+
+class _UnitPrice:
+    """
+    Stand-in product priced at 1.0, used to evaluate promotions independently of the real price.
+    """
+
+    price = 1.0
+
+
+
+
+class _PriceLeft:
+    """
+    Stand-in product priced at what earlier promotions of a stack left of one item's price.
+    """
+
+    __slots__ = ("price",)
+
+    def __init__(self, price):
+        self.price = price
+
+
+
+
+class PromotionResolver:
+    """
+    Picks the cheapest valid combination of a product's promotions.
+
+    Stacking rules:
+        - A promotion created with `stackable=False` (the default) is exclusive: it is only
+          ever applied on its own.
+        - Promotions created with `stackable=True` can be combined with each other. A stack
+          applies each promotion to the price left by the others, so the order does not matter.
+
+    All promotions price linearly in the product price, so the winning combination is chosen
+    once per promotion set and quantity at a unit price of 1.0 and memoized. With n promotions
+    the candidates are the n single promotions plus the best stack, so resolving never
+    enumerates combinations. The memo is bounded and evicts the least recently used entries.
+    The total itself is always computed on the real product, so a single promotion prices
+    exactly as `promotion.apply_promotion(product, quantity)`.
+    Promotions are treated as immutable once they are attached to a product.
+    """
+
+    def __init__(self, max_entries=4096):
+        """
+        Initialize a PromotionResolver.
+
+        Args:
+            max_entries (int): The maximum number of memoized (promotion set, quantity) results.
+        """
+        self._memo = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()  # The resolver is shared by every thread that orders
+
+
+    def resolve(self, promotions, quantity) -> Tuple[float, tuple]:
+        """
+        Finds the cheapest valid combination of promotions for a quantity.
+
+        Args:
+            promotions (List[Promotion]): The promotions of the product.
+            quantity (float): The quantity being bought.
+
+        Returns:
+            Tuple[float, tuple]: The total at a unit price of 1.0 and the chosen promotions.
+        """
+        key = (tuple(promotions), quantity)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+
+        # Evaluated outside the lock; a concurrent miss on the same key computes the same result
+        unit = _UnitPrice()
+        best = (float(quantity), ())
+        stack_ratio = 1.0
+        stack = []
+        for promotion in promotions:
+            total = promotion.apply_promotion(unit, quantity)
+            if total < best[0]:
+                best = (total, (promotion,))
+            if promotion.stackable and quantity and total < quantity:
+                stack_ratio *= total / quantity
+                stack.append(promotion)
+        if len(stack) > 1 and quantity * stack_ratio < best[0]:
+            best = (quantity * stack_ratio, tuple(stack))
+
+        with self._lock:
+            self._memo[key] = best
+            if len(self._memo) > self._max_entries:
+                self._memo.popitem(last=False)
+        return best
+
+
+    def price(self, product, quantity) -> Tuple[float, float, tuple]:
+        """
+        Prices a quantity of a product with its cheapest valid promotion combination.
+
+        Args:
+            product (Product): The product.
+            quantity (float): The quantity being bought.
+
+        Returns:
+            Tuple[float, float, tuple]: The total price, the discount and the applied promotions.
+        """
+        full_price = product.price * quantity
+        if not product.promotion:
+            return float(full_price), 0.0, ()
+        _, applied = self.resolve(product.promotion, quantity)
+        if not applied:
+            return float(full_price), 0.0, ()
+        total_price = applied[0].apply_promotion(product, quantity)
+        for promotion in applied[1:]:
+            total_price = promotion.apply_promotion(_PriceLeft(total_price / quantity), quantity)
+        return float(total_price), float(full_price - total_price), applied
+
+
+    def breakdown(self, product, quantity) -> tuple:
+        """
+        Splits the discount of a purchase between the promotions applied to it.
+
+        In a stack, each promotion is credited with what it took off the price left by the
+        promotions before it.
+
+        Args:
+            product (Product): The product.
+            quantity (float): The quantity bought.
+
+        Returns:
+            tuple: (promotion name, discount) pairs.
+        """
+        if not product.promotion or not quantity:
+            return ()
+        _, total_discount, applied = self.price(product, quantity)
+        unit = _UnitPrice()
+        running = product.price * quantity
+        shares = []
+        for promotion in applied[:-1]:
+            ratio = promotion.apply_promotion(unit, quantity) / quantity
+            shares.append((promotion.name, float(running * (1 - ratio))))
+            running *= ratio
+        if applied:
+            # The last promotion takes the remainder, so the shares add up to the discount exactly
+            shares.append((applied[-1].name, total_discount - sum(share for _, share in shares)))
+        return tuple(shares)
+
+
+    def clear(self):
+        """
+        Drop all memoized results.
+        """
+        with self._lock:
+            self._memo.clear()
+
+
+
+
+default_resolver = PromotionResolver()
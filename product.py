@@ -1,6 +1,8 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 from  promotion import  Promotion
+from pricing import default_resolver
+from changefeed import Purchase
 
 
 class Product:
@@ -30,11 +32,137 @@ class Product:
         # Setting instance variables
         self.name = str(name) # Store name as a str
         self._price = float(price) # Store price as a float
-        self.quantity = float(quantity) # Store quantity as an int
-        self.active = True  # Default attribute
+        self._feed = None  # Optional ChangeFeed notified on every mutation
+        self._counter = None  # Optional shared stock counter, see `use_counter`
+        self._quantity = float(quantity) # Store quantity as a float
+        self._active = True  # Default attribute
         self._promotions = []  # Initialize promotions as an empty list
 
 
+    def attach_feed(self, feed):
+        """
+        Attach a ChangeFeed that is notified of every quantity, price and active change.
+
+        Args:
+            feed (ChangeFeed or None): The feed to publish to, or None to detach.
+        """
+        self._feed = feed
+
+
+    def _emit(self, field, value):
+        # Publish a change to the attached feed, if any
+        if self._feed is not None:
+            self._feed.publish(self.name, field, value)
+
+
+    @property
+    def quantity(self):
+        """
+        Getter method for the quantity in stock.
+        """
+        if self._counter is not None:
+            return self._counter.value()
+        return self._quantity
+
+
+    @quantity.setter
+    def quantity(self, new_quantity):
+        """
+        Raw setter for the quantity. Use `set_quantity` for validation and status updates.
+        """
+        if self._counter is not None:
+            self._counter.set(new_quantity)
+        else:
+            self._quantity = new_quantity
+        self._emit("quantity", new_quantity)
+
+
+    def use_counter(self, counter):
+        """
+        Keep the stock of the product in a thread-safe counter, such as a StripedCounter
+        for hot products that appear in most orders.
+
+        The counter's value replaces the current quantity and is published to the attached
+        feed. Passing None detaches the counter and keeps its last value as the quantity.
+
+        With a counter that is not `exact`, such as a StripedCounter, purchases only publish
+        the quantity once the stock runs out, and returned stock is not published, because
+        an exact read would lock every stripe on every order. Read `quantity` (or set it)
+        to get or publish the exact stock.
+
+        Args:
+            counter (LockedCounter or StripedCounter or None): The counter.
+        """
+        if self._counter is not None:
+            self._quantity = self._counter.value()
+        self._counter = counter
+        if counter is not None:
+            self._quantity = counter.value()
+            self._emit("quantity", self._quantity)
+
+
+    def take_stock(self, quantity) -> float:
+        """
+        Takes a quantity from the stock. Checking and taking the stock is one step, which
+        is atomic when a counter is attached.
+
+        Args:
+            quantity (float): The quantity to take.
+
+        Returns:
+            float: The stock left, or with a counter attached a lower bound of it that is
+                   0 only if the stock is exhausted.
+
+        Raises:
+            Exception: If the stock is insufficient.
+        """
+        if self._counter is None:
+            if quantity > self._quantity:
+                raise Exception(f"Insufficient stock. Only {self._quantity} units are available.")
+            self.quantity -= quantity
+            return self._quantity
+        remaining = self._counter.take(quantity)
+        if remaining is None:
+            raise Exception(f"Insufficient stock. Only {self.quantity} units are available.")
+        # Only publish values the counter knows exactly; reading a striped counter locks every stripe
+        if self._feed is not None and (self._counter.exact or remaining == 0):
+            self._emit("quantity", remaining)
+        return remaining
+
+
+    def return_stock(self, quantity):
+        """
+        Puts a quantity back into the stock, for example when an order is rolled back.
+
+        Args:
+            quantity (float): The quantity to return.
+        """
+        if self._counter is None:
+            self.quantity += quantity
+            return
+        self._counter.put(quantity)
+        if self._feed is not None and self._counter.exact:
+            self._emit("quantity", self._counter.value())
+
+
+    @property
+    def active(self):
+        """
+        Getter method for the active status.
+        """
+        return self._active
+
+
+    @active.setter
+    def active(self, new_active):
+        """
+        Raw setter for the active status. Only publishes a change when the status flips.
+        """
+        if new_active != self._active:
+            self._active = new_active
+            self._emit("active", new_active)
+
+
     @property
     def price(self):
         """
@@ -57,6 +185,7 @@ class Product:
         if new_price < 0:
             raise ValueError("Price cannot be lower than 0")
         self._price = new_price  # Modify the private attribute
+        self._emit("price", new_price)
 
 
     @property
@@ -165,19 +294,18 @@ class Product:
         return f'{self.name}, Price: ${self._price}, Quantity: {self.quantity}, Promotion: {promotion_str}'
 
 
-    def buy(self, quantity) -> Optional[float]:
+    def check_purchase(self, quantity, pending=0):
         """
-        Buys a given quantity of the product.
-        Updates the quantity of the product and returns the total price of the purchase.
+        Checks whether a given quantity of the product can be bought.
+        With a counter attached the stock is not checked here; `take_stock` checks it
+        atomically, so the order path never needs the exact stock.
 
         Args:
             quantity (float): The quantity to buy.
-
-        Returns:
-            float: The total price of the purchase.
+            pending (float): Units of this product already taken earlier in the same order.
 
         Raises:
-            Exception: If the quantity is greater than the available stock or if the product is inactive.
+            Exception: If the product is inactive, the quantity is not positive or exceeds the available stock.
         """
         if not self.active:
             raise Exception(f"The product '{self.name}' is not available for purchase because it is inactive.")
@@ -185,35 +313,81 @@ class Product:
         if quantity <= 0:
             raise Exception("Quantity must be greater than zero.")
 
-        if quantity > self.quantity:
-            raise Exception(f"Insufficient stock. Only {self.quantity} units are available.")
+        if self._counter is None and quantity + pending > self._quantity:
+            raise Exception(f"Insufficient stock. Only {self._quantity - pending} units are available.")
 
-        if self.quantity >= quantity:
-            self.quantity -= quantity
-            if not self._promotions:
-                total_price = self._price * quantity
-                print(f"Successfully purchased {quantity} of {self.name}.")
-                print(f"Remaining quantity: {self.quantity}")
-            else: # add all the promotions
-                total_price = self._price * quantity
-                total_discount = 0
-                for promotion in self._promotions:
-                    discounted_price = promotion.apply_promotion(self, quantity)
-                    discount = total_price - discounted_price
-                    total_discount += discount
-                    total_price = discounted_price
-                promotion_str = "No Promotion" if not self._promotions else ', '.join(
-                    str(promo) for promo in self._promotions)
-                print(f"Promotion: {promotion_str} applied")
-                print(f"Successfully purchased {quantity} of {self.name}.")
-                print(f"Remaining quantity: {self.quantity}")
-            # Deactivate the product if quantity reaches 0
-            if self.quantity == 0:
-                self.deactivate()
+
+    def price_for(self, quantity) -> Tuple[float, float]:
+        """
+        Calculates the price of a given quantity with the cheapest valid combination of the
+        product's promotions, following their stacking rules.
+
+        Args:
+            quantity (float): The quantity to price.
+
+        Returns:
+            Tuple[float, float]: The total price and the total discount.
+        """
+        total_price, total_discount, _ = default_resolver.price(self, quantity)
+        return total_price, total_discount
+
+
+    def complete_purchase(self, quantity, total_price, verbose=True, remaining=None):
+        """
+        Finishes a purchase whose stock has already been taken.
+        Reports the purchase, deactivates the product if its quantity reached 0 and
+        publishes a "purchase" event to the attached feed.
+
+        Args:
+            quantity (float): The quantity bought.
+            total_price (float): The total price of the purchase.
+            verbose (bool): Print the purchase summary.
+            remaining (float): The value returned by `take_stock`, or None to read the quantity.
+                               It is the stock left right after this purchase, which is what
+                               the summary reports even if later lines of the order took more.
+        """
+        if remaining is None:
+            remaining = self.quantity
+        if verbose:
+            if self._promotions:
+                applied = default_resolver.price(self, quantity)[2]
+                if applied:
+                    promotion_str = ', '.join(str(promo) for promo in applied)
+                    print(f"Promotion: {promotion_str} applied")
+            print(f"Successfully purchased {quantity} of {self.name}.")
+            # A striped counter only returns a lower bound, so its exact stock is read instead
+            exact = self._counter is None or self._counter.exact
+            print(f"Remaining quantity: {remaining if exact else self.quantity}")
+        # Deactivate the product if quantity reaches 0
+        if remaining == 0:
+            self.deactivate()
+        if verbose:
             print(f"Total price: ${float(total_price)}\n")
-            return float(total_price)
-        else:
-            print(f"Insufficient quantity of {self.name} in stock.\n")
+        if self._feed is not None:
+            discount = float(self._price * quantity - total_price)
+            self._emit("purchase", Purchase(quantity, float(total_price), discount,
+                                            default_resolver.breakdown(self, quantity)))
+
+
+    def buy(self, quantity) -> Optional[float]:
+        """
+        Buys a given quantity of the product.
+        Updates the quantity of the product and returns the total price of the purchase.
+
+        Args:
+            quantity (float): The quantity to buy.
+
+        Returns:
+            float: The total price of the purchase.
+
+        Raises:
+            Exception: If the quantity is greater than the available stock or if the product is inactive.
+        """
+        self.check_purchase(quantity)
+        remaining = self.take_stock(quantity)
+        total_price, _ = self.price_for(quantity)
+        self.complete_purchase(quantity, total_price, remaining=remaining)
+        return total_price
 
 
 
@@ -259,19 +433,16 @@ class LimitedProduct(Product):
         return (f'{self.name}, Price: ${self._price}, Quantity: {self.quantity}, Maximum: {self.maximum},'
                 f' Promotion: {promotion_str}')
 
-    def buy(self, quantity) -> Optional[float]:
+    def check_purchase(self, quantity, pending=0):
         """
-        Buys a given quantity of the product.
-        Updates the quantity of the product and returns the total price of the purchase.
+        Checks whether a given quantity of the product can be bought, including the per-purchase maximum.
 
         Args:
             quantity (float): The quantity to buy.
-
-        Returns:
-            float: The total price of the purchase.
+            pending (float): Units of this product already taken earlier in the same order.
 
         Raises:
-            Exception: If the quantity is greater than the available stock or if the product is inactive.
+            Exception: If the quantity exceeds the maximum, the available stock or if the product is inactive.
         """
         if not self.active:
             raise Exception(f"The product '{self.name}' is not available for purchase because it is inactive.")
@@ -282,32 +453,4 @@ class LimitedProduct(Product):
         if quantity > self.maximum:
             raise Exception(f"The maximum amount you can buy is {self.maximum}.")
 
-        if quantity > self.quantity:
-            raise Exception(f"Insufficient stock. Only {self.quantity} units are available.")
-
-        if self.quantity >= quantity:
-            self.quantity -= quantity
-            if not self._promotions:
-                total_price = self._price * quantity
-                print(f"Successfully purchased {quantity} of {self.name}.")
-                print(f"Remaining quantity: {self.quantity}")
-            else: # add all the promotions
-                total_price = self._price * quantity
-                total_discount = 0
-                for promotion in self._promotions:
-                    discounted_price = promotion.apply_promotion(self, quantity)
-                    discount = total_price - discounted_price
-                    total_discount += discount
-                    total_price = discounted_price
-                promotion_str = "No Promotion" if not self._promotions else ', '.join(
-                    str(promo) for promo in self._promotions)
-                print(f"Promotion: {promotion_str} applied")
-                print(f"Successfully purchased {quantity} of {self.name}.")
-                print(f"Remaining quantity: {self.quantity}")
-            # Deactivate the product if quantity reaches 0
-            if self.quantity == 0:
-                self.deactivate()
-            print(f"Total price: ${float(total_price)}\n")
-            return float(total_price)
-        else:
-            print(f"Insufficient quantity of {self.name} in stock.\n")
\ No newline at end of file
+        super().check_purchase(quantity, pending)
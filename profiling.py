@@ -0,0 +1,174 @@
+import contextlib
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler for one thread.
+
+    A background thread wakes up every `interval` seconds, reads the Python stack of the
+    profiled thread and counts it. The profiled code is never instrumented, so the overhead
+    only depends on the sampling rate, not on how many calls the order path makes.
+    Stacks are reported in the collapsed format read by flamegraph tools.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, idle: Iterable[str] = ()):
+        """
+        Initialize a SamplingProfiler.
+
+        Args:
+            interval (float): Seconds between samples.
+            thread_id (int): The thread to profile. Defaults to the thread calling `start`.
+            idle (Iterable[str]): Function names that only wait, such as input prompts.
+                                  Samples whose innermost frame is one of them are dropped.
+
+        Raises:
+            ValueError: If the interval is not positive.
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be greater than zero.")
+        self.interval = interval
+        self.thread_id = thread_id
+        self.idle = set(idle)
+        self.samples: Counter = Counter()
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    def start(self):
+        """
+        Start sampling.
+        """
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+
+    def stop(self):
+        """
+        Stop sampling and wait for the sampler thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if frame.f_code.co_name in self.idle:
+                self.dropped += 1
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+
+    def collapsed(self) -> List[str]:
+        """
+        Returns:
+            List[str]: One "outer;...;inner count" line per distinct stack, most frequent first.
+        """
+        return [f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()]
+
+
+    def write_collapsed(self, path):
+        """
+        Write the collapsed stacks to a file, e.g. for flamegraph.pl or speedscope.
+
+        Args:
+            path (str): The output file.
+        """
+        with open(path, "w") as output:
+            for line in self.collapsed():
+                output.write(line + "\n")
+
+
+    def hotspots(self, top=10) -> List[Tuple[str, int, int]]:
+        """
+        Returns the functions with the most samples.
+
+        Args:
+            top (int): The number of functions.
+
+        Returns:
+            List[Tuple[str, int, int]]: (function, self samples, total samples), by self samples.
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [(label, count, total[label]) for label, count in own.most_common(top)]
+
+
+    def summary(self, top=10) -> str:
+        """
+        Returns:
+            str: A table of the top hotspots.
+        """
+        sampled = sum(self.samples.values())
+        lines = [f"{sampled} samples ({self.dropped} idle samples dropped), every {self.interval * 1000:g} ms",
+                 f"{'self %':>7} {'total %':>8}  function"]
+        for label, own, total in self.hotspots(top):
+            lines.append(f"{own / sampled:7.1%} {total / sampled:8.1%}  {label}")
+        return "\n".join(lines)
+
+
+
+
+@contextlib.contextmanager
+def profiled(output: Optional[str] = None, interval=0.005, top=10, idle: Iterable[str] = ()):
+    """
+    Profile the calling thread for the duration of a `with` block.
+
+    On exit the collapsed stacks are written to `output`, if given, and the top hotspots are printed.
+
+    Args:
+        output (str): The collapsed-stack output file, or None.
+        interval (float): Seconds between samples.
+        top (int): The number of hotspots printed.
+        idle (Iterable[str]): Function names whose samples are dropped as idle.
+
+    Yields:
+        SamplingProfiler: The running profiler.
+    """
+    profiler = SamplingProfiler(interval, idle=idle)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        if output is not None:
+            profiler.write_collapsed(output)
+        if profiler.samples:
+            print(profiler.summary(top))
+        if output is not None:
+            print(f"Collapsed stacks written to {output}")
@@ -7,16 +7,20 @@ class Promotion(ABC):
 
     Attributes:
         name (str): The name of the promotion.
+        stackable (bool): Whether the promotion can be combined with other stackable promotions.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, stackable=False):
         """
         Initialize a Promotion instance.
 
         Args:
             name (str): The name of the promotion.
+            stackable (bool): Whether the promotion can be combined with other stackable promotions.
+                              A promotion that is not stackable is only applied on its own.
         """
         self.name = name
+        self.stackable = stackable
 
 
     @abstractmethod
@@ -112,18 +116,19 @@ class PercentDiscount(Promotion):
         percent (float): The percentage discount to apply.
     """
 
-    def __init__(self, member, percent=0):
+    def __init__(self, member, percent=0, stackable=False):
         """
         Initialize a PercentDiscount instance.
 
         Args:
             member (str): The name of the promotion or membership type.
             percent (float): The percentage discount. Must be between 0 and 100.
+            stackable (bool): Whether the discount can be combined with other stackable promotions.
 
         Raises:
             ValueError: If the percentage is not within the range 0 to 100.
         """
-        super().__init__(member)
+        super().__init__(member, stackable)
         if percent < 0 or percent > 100:
             raise ValueError("Discount percentage must be between 0 and 100.")
         self.percent = percent
@@ -0,0 +1,108 @@
+import bisect
+import itertools
+import re
+from typing import Dict, List
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> List[str]:
+    """
+    Splits text into lowercase alphanumeric tokens.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The tokens.
+    """
+    return _TOKEN.findall(str(text).lower())
+
+
+class NameIndex:
+    """
+    Prefix search over product names.
+
+    Every name token maps to the products containing it (an inverted index), and the distinct
+    tokens are kept in a sorted array. A prefix is resolved with two binary searches over the
+    array, so a query costs O(log n) plus the size of the matches. A multi-token query returns
+    the products matching every token prefix, e.g. "goo pix" finds "Google Pixel 7".
+    """
+
+    def __init__(self):
+        self._tokens: List[str] = []  # Sorted distinct tokens
+        self._postings: Dict[str, Dict] = {}  # token -> {product: None}
+        self._order: Dict = {}  # product -> insertion number, to return matches in store order
+        self._counter = itertools.count()
+
+
+    def __len__(self):
+        return len(self._order)
+
+
+    def add(self, product):
+        """
+        Index a product by its name.
+
+        Args:
+            product (Product): The product.
+        """
+        if product in self._order:
+            return
+        self._order[product] = next(self._counter)
+        for token in set(tokenize(product.name)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+            postings[product] = None
+
+
+    def remove(self, product):
+        """
+        Remove a product from the index.
+
+        Args:
+            product (Product): The product.
+        """
+        if self._order.pop(product, None) is None:
+            return
+        for token in set(tokenize(product.name)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product, None)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+
+    def _prefix_matches(self, prefix) -> Dict:
+        start = bisect.bisect_left(self._tokens, prefix)
+        end = bisect.bisect_left(self._tokens, prefix + "\uffff", start)
+        if end - start == 1:
+            return self._postings[self._tokens[start]]
+        matches = {}
+        for token in self._tokens[start:end]:
+            matches.update(self._postings[token])
+        return matches
+
+
+    def search(self, query) -> list:
+        """
+        Finds the products whose name has a token starting with each token of the query.
+
+        Args:
+            query (str): The query, e.g. "pix" or "google pix".
+
+        Returns:
+            List[Product]: The matching products, in the order they were added.
+        """
+        prefixes = tokenize(query)
+        if not prefixes:
+            return []
+        candidates = sorted((self._prefix_matches(prefix) for prefix in prefixes), key=len)
+        smallest, others = candidates[0], candidates[1:]
+        matches = [product for product in smallest if all(product in other for other in others)]
+        return sorted(matches, key=self._order.__getitem__)
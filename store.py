@@ -1,5 +1,32 @@
+import itertools
+import threading
+
 from product import Product
-from typing import List, Tuple
+from changefeed import snapshot
+from dedup import DedupCache
+from pipeline import (OrderPipeline, Receipt, parse_stage, validate_stage, price_stage,
+                      reserve_stage, make_commit_stage, receipt_stage)
+from search import NameIndex
+from timerwheel import TimerWheel
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class Reservation:
+    """
+    Stock of a product held for a cart in progress.
+
+    Attributes:
+        product (Product): The product held.
+        quantity (float): The quantity held.
+    """
+
+    __slots__ = ("product", "quantity")
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+
+
 
 
 class Store:
@@ -23,9 +50,57 @@ class Store:
             that all elements are instances of the `Product` class.
         """
         self.products = []
+        self._by_name = {}  # name -> first product with that name, for `find_product`
+        self._feed = None
+        self.pipeline = OrderPipeline(batch_size=1)  # Used by `order`; can be swapped for a custom pipeline
+        self.reservation_timers = TimerWheel()  # Drives reservation expiry
+        self._reservations = {}  # reservation id -> Reservation
+        self._reserved = {}  # product -> quantity held by open reservations
+        self._reservation_ids = itertools.count(1)
+        self.popularity = None  # Optional PopularityTracker used to list hot products first
+        self.name_index = NameIndex()
+        self.order_dedup = DedupCache()  # idempotency key -> (order lines, total)
+        self._in_flight = {}  # idempotency key -> Event set when its order finishes
+        self._in_flight_lock = threading.Lock()
         self.add_product(products)
 
 
+    def attach_feed(self, feed):
+        """
+        Attach a ChangeFeed to the store and all of its products.
+
+        Every product currently in the store is published as an "added" event, so the
+        feed starts from the full catalog. Products added or removed later are published too.
+        Feed events identify products by name, so the names must be unique.
+
+        Args:
+            feed (ChangeFeed): The feed to publish to.
+
+        Raises:
+            ValueError: If two products of the store share a name.
+        """
+        names = [product.name for product in self.products]
+        if len(set(names)) != len(names):
+            raise ValueError("Product names must be unique to attach a change feed.")
+        self._feed = feed
+        for product in self.products:
+            product.attach_feed(feed)
+            feed.publish(product.name, "added", snapshot(product))
+
+
+    def find_product(self, name) -> Optional[Product]:
+        """
+        Returns the first product in the store with the given name.
+
+        Args:
+            name (str): The product name.
+
+        Returns:
+            Product or None: The product, or None if no product has that name.
+        """
+        return self._by_name.get(name)
+
+
     def add_product(self, product):
         """
         Adds a product or a list of products to the store.
@@ -40,14 +115,27 @@ class Store:
             product (Product or list): A single Product instance or a list of Product instances to add to the store.
 
         Raises:
-            ValueError: If a list is provided, and it contains any element that is not an instance of Product.
+            ValueError: If a list is provided, and it contains any element that is not an instance of Product,
+                        or if a change feed is attached and a name is already used.
         """
         if isinstance(product, Product):
-            self.products.append(product)
+            added = [product]
         elif isinstance(product, list) and all(isinstance(item, Product) for item in product):
-            self.products.extend(product)
+            added = product
         else:
             raise ValueError("Argument must be a Product instance or a list of Product instances.")
+        if self._feed is not None:
+            names = [item.name for item in added]
+            if len(set(names)) != len(names) or any(name in self._by_name for name in names):
+                raise ValueError("Product names must be unique while a change feed is attached.")
+        self.products.extend(added)
+        for item in added:
+            self.name_index.add(item)
+            self._by_name.setdefault(item.name, item)
+        if self._feed is not None:
+            for item in added:
+                item.attach_feed(self._feed)
+                self._feed.publish(item.name, "added", snapshot(item))
 
 
     def remove_product(self, product):
@@ -67,6 +155,17 @@ class Store:
         """
         if isinstance(product, Product):
             self.products.remove(product)
+            if product not in self.products:
+                self.name_index.remove(product)
+            if self._by_name.get(product.name) is product:
+                # Only a duplicate name needs a scan, to find the next product with it
+                del self._by_name[product.name]
+                duplicate = next((item for item in self.products if item.name == product.name), None)
+                if duplicate is not None:
+                    self._by_name[product.name] = duplicate
+            if self._feed is not None:
+                product.attach_feed(None)
+                self._feed.publish(product.name, "removed", None)
         else:
             raise ValueError("The product must be an instance of the Product class.")
 
@@ -85,6 +184,22 @@ class Store:
         return sum(getattr(product, 'quantity', 0) for product in self.products if product.quantity != float('inf'))
 
 
+    def search(self, query) -> List[Product]:
+        """
+        Finds active products by name prefix.
+
+        Every word of the query must be the start of a word in the product name,
+        ignoring case. For example "goo pix" finds "Google Pixel 7".
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            List[Product]: The matching active products, in store order.
+        """
+        return [product for product in self.name_index.search(query) if product.is_active()]
+
+
     def get_all_products(self) -> List[Product]:
         """
         Returns a list of all active products in the store.
@@ -92,35 +207,208 @@ class Store:
         This method filters the `self.products` list and returns only those
         products whose `active` attribute is set to `True`. If a product
         is inactive (i.e., `active` is `False`), it will not be included
-        in the returned list.
+        in the returned list. If the store tracks popularity, the hot
+        products are listed first.
 
         Returns:
         List[Product]: A list of active Product instances.
         """
-        return [product for product in self.products if product.is_active()]
+        products = [product for product in self.products if product.is_active()]
+        if self.popularity is not None:
+            return self.popularity.hot_first(products)
+        return products
 
 
-    def order(self, shopping_list: List[Tuple[Product, int]]) -> float:
+    def order(self, shopping_list: List[Tuple[Product, int]], idempotency_key: Optional[str] = None) -> float:
         """
         Processes an order for multiple products and calculates the total cost.
 
         This method takes a list of tuples where each tuple contains a `Product`
-        instance and an integer quantity. It iterates through the list, calling
-        the `buy` method on each product with the specified quantity, and accumulates
-        the total cost of the order.
+        instance and an integer quantity. The order runs through the store's order
+        pipeline: every line is validated and priced before any stock is taken, so a
+        rejected order leaves the stock untouched.
+
+        If an idempotency key is given and an order with the same key was already
+        completed, its total is returned again without buying anything. A retry that
+        arrives while the first attempt is still running waits for it; orders with
+        other keys are not held up. Rejected orders are not remembered, so they can
+        be retried.
 
         Args:
             shopping_list (List[Tuple[Product, int]]): A list of tuples, each containing
                 a `Product` instance and a quantity (int) to purchase.
+            idempotency_key (str): A client-chosen key identifying the order across retries.
         Returns:
             float: The total price for all products in the shopping list.
+
+        Raises:
+            Exception: If any line of the order can not be bought, or if the idempotency
+                       key was already used for a different order.
+        """
+        if idempotency_key is None:
+            return self._run_order(shopping_list)
+        lines = tuple(shopping_list)
+        while True:
+            with self._in_flight_lock:
+                done = self.order_dedup.get(idempotency_key)
+                if done is not None:
+                    done_lines, total = done
+                    if done_lines != lines:
+                        raise Exception(f"Idempotency key '{idempotency_key}' was already used for a different order.")
+                    return total
+                finished = self._in_flight.get(idempotency_key)
+                if finished is None:
+                    finished = self._in_flight[idempotency_key] = threading.Event()
+                    break
+            # Another attempt with this key is running; wait for it, then look again
+            finished.wait()
+        try:
+            total = self._run_order(shopping_list)
+            self.order_dedup.put(idempotency_key, (lines, total))
+            return total
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[idempotency_key]
+            finished.set()
+
+
+    def _run_order(self, shopping_list) -> float:
+        receipt = self.pipeline.process([shopping_list])[0]
+        if receipt.error is not None:
+            raise receipt.error
+        return receipt.total
+
+
+    def order_stream(self, shopping_lists: Iterable[List[Tuple[Product, int]]],
+                     pipeline: Optional[OrderPipeline] = None) -> Iterator[Receipt]:
+        """
+        Processes a stream of orders lazily, in batches, with bounded memory.
+
+        Rejected orders do not stop the stream; they produce a receipt carrying the error.
+
+        Args:
+            shopping_lists (Iterable[List[Tuple[Product, int]]]): The orders to process.
+            pipeline (OrderPipeline): The pipeline to use. Defaults to a quiet pipeline
+                                      that does not print every purchase.
+
+        Returns:
+            Iterator[Receipt]: One receipt per order, in input order.
+        """
+        if pipeline is None:
+            pipeline = OrderPipeline([parse_stage, validate_stage, price_stage, reserve_stage,
+                                      make_commit_stage(verbose=False), receipt_stage])
+        return pipeline.run(shopping_lists)
+
+
+    def reserve(self, product, quantity, ttl=900.0) -> int:
+        """
+        Holds stock of a product for a cart in progress without selling it.
+
+        The stock is taken immediately, so `product.quantity` is the quantity still available
+        to other customers. The hold is released automatically after `ttl` seconds unless it
+        is confirmed first.
+
+        Args:
+            product (Product): The product to hold.
+            quantity (float): The quantity to hold.
+            ttl (float): Seconds until the hold expires.
+
+        Returns:
+            int: The reservation id.
+
+        Raises:
+            Exception: If the quantity can not be bought.
+        """
+        self.expire_reservations()
+        product.check_purchase(quantity)
+        product.take_stock(quantity)
+        reservation_id = next(self._reservation_ids)
+        self._reservations[reservation_id] = Reservation(product, quantity)
+        self._reserved[product] = self._reserved.get(product, 0) + quantity
+        self.reservation_timers.schedule(reservation_id, ttl)
+        return reservation_id
+
+
+    def confirm(self, reservation_id, verbose=True) -> float:
+        """
+        Buys the stock held by a reservation.
+
+        Args:
+            reservation_id (int): The reservation id returned by `reserve`.
+            verbose (bool): Print the purchase summary, like `Product.buy`.
+
+        Returns:
+            float: The total price of the purchase.
+
+        Raises:
+            Exception: If the reservation has expired or does not exist.
+        """
+        self.expire_reservations()
+        reservation = self._close_reservation(reservation_id)
+        total_price, _ = reservation.product.price_for(reservation.quantity)
+        reservation.product.complete_purchase(reservation.quantity, total_price, verbose)
+        return total_price
+
+
+    def release(self, reservation_id):
+        """
+        Cancels a reservation and returns its stock.
+
+        Args:
+            reservation_id (int): The reservation id returned by `reserve`.
+
+        Raises:
+            Exception: If the reservation has expired or does not exist.
+        """
+        self.expire_reservations()
+        reservation = self._close_reservation(reservation_id)
+        reservation.product.return_stock(reservation.quantity)
+
+
+    def expire_reservations(self) -> int:
+        """
+        Returns the stock of every reservation whose time ran out.
+
+        Returns:
+            int: The number of expired reservations.
         """
-        total_ordering = 0.0
-        if all(isinstance(item, tuple) for item in shopping_list):
-            for item in shopping_list:
-                product, quantity = item
-                total_ordering += product.buy(quantity)
-        return total_ordering
+        expired = self.reservation_timers.advance()
+        for reservation_id in expired:
+            reservation = self._reservations.pop(reservation_id)
+            self._unhold(reservation)
+            reservation.product.return_stock(reservation.quantity)
+        return len(expired)
+
+
+    def get_reserved_quantity(self, product) -> float:
+        """
+        Returns the quantity of a product held by open reservations.
+
+        Args:
+            product (Product): The product.
+
+        Returns:
+            float: The held quantity.
+        """
+        self.expire_reservations()
+        return self._reserved.get(product, 0)
+
+
+    def _close_reservation(self, reservation_id):
+        reservation = self._reservations.pop(reservation_id, None)
+        if reservation is None:
+            raise Exception(f"Reservation {reservation_id} has expired or does not exist.")
+        self.reservation_timers.cancel(reservation_id)
+        self._unhold(reservation)
+        return reservation
+
+
+    def _unhold(self, reservation):
+        remaining = self._reserved[reservation.product] - reservation.quantity
+        if remaining:
+            self._reserved[reservation.product] = remaining
+        else:
+            del self._reserved[reservation.product]
 
 
     def __contains__(self, item):
@@ -0,0 +1,48 @@
+import pytest
+from product import Product
+from store import Store
+from promotion import ThirdOneFree, PercentDiscount
+from changefeed import ChangeFeed
+from analytics import SalesAnalytics
+
+
+@pytest.fixture
+def store():
+    macbook = Product("MacBook", price=100, quantity=100)
+    macbook.set_promotion(ThirdOneFree("Third One Free!"))
+    pixel = Product("Pixel", price=10, quantity=100)
+    pixel.set_promotion(PercentDiscount("10% off!", percent=10, stackable=True))
+    pixel.set_promotion(PercentDiscount("Members 50% off!", percent=50, stackable=True))
+    return Store([macbook, pixel])
+
+
+def test_rollups_by_product_and_promotion(store, clock):
+    feed = ChangeFeed(keep_log=False)
+    store.attach_feed(feed)
+    analytics = SalesAnalytics(feed, clock=clock)
+    macbook, pixel = store.products
+    store.order([(macbook, 3), (pixel, 2)])
+    store.order([(macbook, 1)])
+
+    assert analytics.total().purchases == 3
+    assert analytics.by_product("MacBook").revenue == 300
+    assert analytics.by_product("MacBook").discount == 100
+    assert analytics.by_promotion("Third One Free!").discount == 100
+    assert analytics.by_promotion("10% off!").discount == pytest.approx(2)
+    assert analytics.by_promotion("Members 50% off!").discount == pytest.approx(9)
+    assert analytics.by_product("Pixel").discount == pytest.approx(11)
+
+
+def test_time_buckets_are_bounded(store, clock):
+    feed = ChangeFeed(keep_log=False)
+    store.attach_feed(feed)
+    analytics = SalesAnalytics(feed, minutes=3, clock=clock)
+    macbook = store.products[0]
+    for minute in range(5):
+        clock.now = minute * 60 + 1
+        store.order([(macbook, 1)])
+    minutes = analytics.per_minute(10)
+    assert [start for start, _ in minutes] == [120, 180, 240]
+    assert [totals.units for _, totals in minutes] == [1, 1, 1]
+    assert analytics.window(2).revenue == 200
+    assert analytics.per_hour(1)[0][1].units == 5
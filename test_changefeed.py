@@ -0,0 +1,98 @@
+import pytest
+from product import Product, NonStockedProduct, LimitedProduct
+from store import Store
+from changefeed import ChangeFeed, apply_change
+
+
+@pytest.fixture
+def store():
+    return Store([Product("MacBook", price=1450, quantity=100),
+                  NonStockedProduct("Windows License", price=125),
+                  LimitedProduct("Shipping", price=10, quantity=250, maximum=1)])
+
+
+def test_mutations_are_published_in_order(store):
+    feed = ChangeFeed()
+    store.attach_feed(feed)
+    start = feed.last_seq
+    macbook = store.find_product("MacBook")
+    macbook.buy(10)
+    macbook.price = 1000
+    events = feed.events(since=start)
+    assert [event.field for event in events] == ["quantity", "purchase", "price"]
+    assert events[0].value == 90
+    assert events[1].value.quantity == 10
+    assert events[1].value.total_price == 14500
+    assert events[2].value == 1000
+    assert [event.seq for event in events] == [start + 1, start + 2, start + 3]
+
+
+def test_compacted_keeps_latest_per_key(store):
+    feed = ChangeFeed()
+    store.attach_feed(feed)
+    macbook = store.find_product("MacBook")
+    for _ in range(5):
+        macbook.buy(1)
+    quantity_events = [event for event in feed.compacted() if event.field == "quantity"]
+    assert len(quantity_events) == 1
+    assert quantity_events[0].value == 95
+
+
+def test_late_replica_catches_up_and_stays_in_sync(store):
+    feed = ChangeFeed()
+    store.attach_feed(feed)
+    store.find_product("MacBook").buy(100)
+    store.remove_product(store.find_product("Windows License"))
+
+    replica = Store([])
+    feed.subscribe(lambda event: apply_change(replica, event))
+    assert [product.name for product in replica.products] == ["MacBook", "Shipping"]
+    assert replica.find_product("MacBook").quantity == 0
+    assert not replica.find_product("MacBook").is_active()
+
+    store.find_product("Shipping").buy(1)
+    store.add_product(Product("Google Pixel 7", price=500, quantity=250))
+    assert replica.find_product("Shipping").quantity == 249
+    assert replica.find_product("Google Pixel 7").price == 500
+    assert isinstance(replica.find_product("Shipping"), LimitedProduct)
+
+
+def test_unsubscribe_stops_delivery(store):
+    feed = ChangeFeed()
+    store.attach_feed(feed)
+    received = []
+    unsubscribe = feed.subscribe(received.append, replay=False)
+    store.find_product("MacBook").buy(1)
+    unsubscribe()
+    store.find_product("MacBook").buy(1)
+    assert [event.field for event in received] == ["quantity", "purchase"]
+
+
+def test_purchases_are_not_compacted(store):
+    feed = ChangeFeed()
+    store.attach_feed(feed)
+    store.find_product("MacBook").buy(1)
+    assert all(event.field != "purchase" for event in feed.compacted())
+
+
+def test_removed_product_leaves_only_a_tombstone(store):
+    feed = ChangeFeed()
+    store.attach_feed(feed)
+    store.find_product("MacBook").buy(1)
+    store.remove_product(store.find_product("MacBook"))
+    events = [event for event in feed.compacted() if event.name == "MacBook"]
+    assert [event.field for event in events] == ["removed"]
+
+
+def test_duplicate_names_are_rejected_while_a_feed_is_attached(store):
+    duplicate = Store([Product("MacBook", price=1450, quantity=100), Product("MacBook", price=1000, quantity=5)])
+    with pytest.raises(ValueError, match="Product names must be unique to attach a change feed."):
+        duplicate.attach_feed(ChangeFeed())
+
+    store.attach_feed(ChangeFeed())
+    with pytest.raises(ValueError, match="Product names must be unique while a change feed is attached."):
+        store.add_product(Product("MacBook", price=1000, quantity=5))
+    assert len(store.products) == 3
+    store.remove_product(store.find_product("MacBook"))
+    store.add_product(Product("MacBook", price=1000, quantity=5))
+    assert store.find_product("MacBook").price == 1000
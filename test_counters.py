@@ -0,0 +1,97 @@
+import threading
+import pytest
+from product import LimitedProduct
+from store import Store
+from counters import LockedCounter, StripedCounter
+from changefeed import ChangeFeed
+
+
+def test_striped_counter_exact_value_and_rebalance():
+    counter = StripedCounter(10, stripes=4)
+    assert counter.value() == 10
+    # The home stripe only holds part of the stock, so this forces a rebalance
+    assert counter.take(9)
+    assert counter.value() == 1
+    assert not counter.take(2)
+    counter.put(3)
+    assert counter.value() == 4
+
+
+def test_counter_rejects_infinite_stock():
+    with pytest.raises(ValueError, match="Counter value must be a finite, non-negative number."):
+        StripedCounter(float('inf'))
+    with pytest.raises(ValueError, match="Counter value must be a finite, non-negative number."):
+        LockedCounter(-1)
+
+
+def test_threads_never_oversell_a_striped_product():
+    shipping = LimitedProduct("Shipping", price=10, quantity=0, maximum=1)
+    shipping.use_counter(StripedCounter(1000, stripes=8))
+    store = Store([shipping])
+    sold = []
+
+    def worker():
+        for receipt in store.order_stream([(shipping, 1)] for _ in range(200)):
+            if receipt.ok:
+                sold.append(receipt.total)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sold) == 1000
+    assert shipping.get_quantity() == 0
+    assert not shipping.is_active()
+
+
+@pytest.mark.parametrize("with_feed", [False, True])
+def test_order_path_does_not_lock_every_stripe(with_feed):
+    shipping = LimitedProduct("Shipping", price=10, quantity=0, maximum=1)
+    counter = StripedCounter(1000, stripes=4)
+    shipping.use_counter(counter)
+    store = Store([shipping])
+    if with_feed:
+        store.attach_feed(ChangeFeed())
+    acquisitions = []
+    acquire_all = counter._acquire_all
+    counter._acquire_all = lambda: (acquisitions.append(1), acquire_all())
+    receipts = list(store.order_stream([(shipping, 1)] for _ in range(10)))
+    assert all(receipt.ok for receipt in receipts)
+    assert acquisitions == []
+
+
+def test_sold_out_is_detected_from_take():
+    shipping = LimitedProduct("Shipping", price=10, quantity=0, maximum=1)
+    shipping.use_counter(StripedCounter(3, stripes=4))
+    store = Store([shipping])
+    receipts = list(store.order_stream([(shipping, 1)] for _ in range(4)))
+    assert [receipt.ok for receipt in receipts] == [True, True, True, False]
+    assert not shipping.is_active()
+
+
+def test_use_counter_replaces_and_restores_quantity():
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    shipping.use_counter(LockedCounter(100))
+    assert shipping.quantity == 100
+    shipping.buy(1)
+    shipping.use_counter(None)
+    assert shipping.quantity == 99
+
+
+def test_feed_hears_exact_quantities_only():
+    feed = ChangeFeed()
+    locked = LimitedProduct("Locked", price=10, quantity=0, maximum=1)
+    locked.use_counter(LockedCounter(2))
+    striped = LimitedProduct("Striped", price=10, quantity=0, maximum=1)
+    striped.use_counter(StripedCounter(100, stripes=4))
+    Store([locked, striped]).attach_feed(feed)
+    events = []
+    feed.subscribe(events.append, replay=False)
+    locked.buy(1)
+    striped.buy(1)
+    assert [(event.name, event.value) for event in events if event.field == "quantity"] == [("Locked", 1)]
+    locked.buy(1)
+    assert [event.value for event in events if event.field == "quantity"][-1] == 0
+    assert not locked.is_active()
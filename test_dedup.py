@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+from product import Product
+from store import Store
+from dedup import BloomFilter, DedupCache
+
+
+@pytest.fixture
+def store():
+    return Store([Product("MacBook", price=1450, quantity=100)])
+
+
+def test_retried_order_is_applied_once(store):
+    macbook = store.products[0]
+    assert store.order([(macbook, 2)], idempotency_key="order-1") == 2900
+    assert store.order([(macbook, 2)], idempotency_key="order-1") == 2900
+    assert macbook.quantity == 98
+    store.order([(macbook, 2)], idempotency_key="order-2")
+    assert macbook.quantity == 96
+
+
+def test_rejected_order_can_be_retried(store):
+    macbook = store.products[0]
+    with pytest.raises(Exception):
+        store.order([(macbook, 200)], idempotency_key="order-1")
+    assert store.order([(macbook, 1)], idempotency_key="order-1") == 1450
+
+
+def test_key_reused_for_a_different_order_is_rejected(store):
+    macbook = store.products[0]
+    store.order([(macbook, 2)], idempotency_key="order-1")
+    with pytest.raises(Exception, match="Idempotency key 'order-1' was already used for a different order."):
+        store.order([(macbook, 3)], idempotency_key="order-1")
+    assert macbook.quantity == 98
+
+
+def test_only_retries_of_the_same_key_wait(store):
+    macbook = store.products[0]
+    started, release = threading.Event(), threading.Event()
+
+    class SlowProduct(Product):
+        def check_purchase(self, quantity, pending=0):
+            started.set()
+            release.wait(5)
+            super().check_purchase(quantity, pending)
+
+    slow = SlowProduct("Slow", price=10, quantity=10)
+    store.add_product(slow)
+    totals = []
+    attempts = [threading.Thread(target=lambda: totals.append(store.order([(slow, 1)], idempotency_key="slow")))
+                for _ in range(2)]
+    attempts[0].start()
+    started.wait(5)
+    attempts[1].start()
+    # An order with another key goes through while the slow one is still running
+    assert store.order([(macbook, 1)], idempotency_key="other") == 1450
+    assert attempts[0].is_alive()
+    release.set()
+    for attempt in attempts:
+        attempt.join()
+    assert totals == [10, 10]
+    assert slow.quantity == 9
+
+
+@pytest.mark.parametrize("use_bloom", [False, True])
+def test_cache_is_bounded_and_expires(use_bloom, clock):
+    cache = DedupCache(max_entries=3, ttl=10, use_bloom=use_bloom, clock=clock)
+    for index in range(10):
+        cache.put(f"key-{index}", index)
+    assert len(cache) == 3
+    assert cache.get("key-0") is None
+    assert cache.get("key-9") == 9
+    clock.now = 10
+    assert cache.get("key-9") is None
+
+
+def test_bloom_rebuild_never_hides_a_live_key(monkeypatch):
+    cache = DedupCache(max_entries=4, use_bloom=True)
+    cache.put("hot", 1)
+    putting, readers, seen = [None], [], []
+    add = BloomFilter.add
+
+    def add_during_rebuild(bloom, key):
+        # The first key added that is not the one being put is the start of a rebuild
+        if key != putting[0] and not readers:
+            readers.append(threading.Thread(target=lambda: seen.append(cache.get("hot"))))
+            readers[0].start()
+            readers[0].join(0.1)
+        add(bloom, key)
+
+    monkeypatch.setattr(BloomFilter, "add", add_during_rebuild)
+    for index in range(10):
+        putting[0] = f"key-{index}"
+        cache.put(putting[0], index)
+        cache.get("hot")
+    assert readers
+    readers[0].join()
+    assert seen == [1]
+
+
+def test_bloom_filter_never_misses():
+    bloom = BloomFilter(1000)
+    for index in range(1000):
+        bloom.add(f"key-{index}")
+    assert all(bloom.might_contain(f"key-{index}") for index in range(1000))
+    false_positives = sum(bloom.might_contain(f"other-{index}") for index in range(10000))
+    assert false_positives < 300
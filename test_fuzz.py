@@ -0,0 +1,47 @@
+import product
+from product import Product
+from fuzz import run, make_pipeline_engine, reference_engine, reference_price
+from pricing import PromotionResolver
+
+
+def test_pipeline_agrees_with_reference():
+    assert run(make_pipeline_engine(batch_size=4), cases=300, seed=0) is None
+
+
+def test_divergence_is_found_and_minimized():
+    def broken_engine(catalog, orders):
+        # Forgets to deactivate products that sell out
+        outcomes, state = reference_engine(catalog, orders)
+        return outcomes, [(quantity, True) for quantity, _ in state]
+
+    divergence = run(broken_engine, cases=300, seed=0)
+    assert divergence is not None
+    assert len(divergence.orders) == 1
+    assert len(divergence.orders[0]) == 1
+    assert len(divergence.catalog) == 1
+    assert divergence.catalog[0]["promotions"] == []
+    assert "Divergence for seed" in str(divergence)
+
+
+def test_reference_price_follows_stacking_rules():
+    product = Product("MacBook", price=10, quantity=100)
+    spec = {"promotions": [("PercentDiscount", True, 50), ("ThirdOneFree", True, 0),
+                           ("SecondHalfPrice", False, 0)]}
+    # 50% off stacked with Third One Free beats Second Half price alone
+    assert reference_price(product, spec, 3) == 10.0
+    spec["promotions"][1] = ("ThirdOneFree", False, 0)
+    assert reference_price(product, spec, 3) == 15.0
+
+
+def test_resolver_bug_is_caught(monkeypatch):
+    class SingleOnlyResolver(PromotionResolver):
+        # Ignores stacks, so the object model and the pipeline are wrong together
+        def resolve(self, promotions, quantity):
+            unit = type("Unit", (), {"price": 1.0})()
+            return min([(float(quantity), ())] + [(promotion.apply_promotion(unit, quantity), (promotion,))
+                                                  for promotion in promotions], key=lambda best: best[0])
+
+    monkeypatch.setattr(product, "default_resolver", SingleOnlyResolver())
+    divergence = run(make_pipeline_engine(batch_size=4), cases=300, seed=0)
+    assert divergence is not None
+    assert len(divergence.catalog) == 1
@@ -0,0 +1,28 @@
+import main
+from product import Product
+from store import Store
+
+
+def run_with_input(monkeypatch, entries, function, *args):
+    answers = iter(entries)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    function(*args)
+
+
+def test_choosing_a_product_fully_held_by_the_cart(monkeypatch, capsys):
+    macbook = Product("MacBook", price=1450, quantity=2)
+    store = Store([macbook])
+    # Reserve all stock, choose the same product again, then finish the order
+    run_with_input(monkeypatch, ["1", "2", "1", ""], main.make_an_order, store)
+    output = capsys.readouterr().out
+    assert "No more stock of MacBook is available." in output
+    assert "Order complete! Total payment: $2900.00" in output
+    assert macbook.quantity == 0
+
+
+def test_empty_amount_goes_back(monkeypatch, capsys):
+    macbook = Product("MacBook", price=1450, quantity=2)
+    store = Store([macbook])
+    run_with_input(monkeypatch, ["1", "", ""], main.make_an_order, store)
+    assert "No products ordered." in capsys.readouterr().out
+    assert macbook.quantity == 2
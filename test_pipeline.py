@@ -0,0 +1,65 @@
+import pytest
+from product import Product, LimitedProduct
+from store import Store
+from promotion import SecondHalfPrice
+from pipeline import (OrderPipeline, parse_stage, validate_stage, price_stage, reserve_stage,
+                      make_commit_stage, receipt_stage)
+
+
+@pytest.fixture
+def store():
+    macbook = Product("MacBook", price=1450, quantity=100)
+    macbook.set_promotion(SecondHalfPrice("Second Half price!"))
+    return Store([macbook,
+                  Product("Google Pixel 7", price=500, quantity=3),
+                  LimitedProduct("Shipping", price=10, quantity=250, maximum=1)])
+
+
+def test_order_matches_buy(store):
+    macbook, pixel, shipping = store.products
+    assert store.order([(macbook, 2), (shipping, 1)]) == 1450 + 725 + 10
+    assert macbook.quantity == 98
+    assert shipping.quantity == 249
+
+
+def test_rejected_order_leaves_stock_untouched(store):
+    macbook, pixel, shipping = store.products
+    with pytest.raises(Exception, match="The maximum amount you can buy is 1."):
+        store.order([(macbook, 2), (shipping, 2)])
+    assert macbook.quantity == 100
+
+
+def test_duplicate_lines_are_validated_together(store):
+    pixel = store.products[1]
+    with pytest.raises(Exception, match="Insufficient stock. Only 1.0 units are available."):
+        store.order([(pixel, 2), (pixel, 2)])
+    assert pixel.quantity == 3
+
+
+def test_stream_rejects_orders_that_run_out_within_a_batch(store):
+    pixel = store.products[1]
+    receipts = list(store.order_stream([[(pixel, 2)], [(pixel, 2)], [(pixel, 1)]]))
+    assert [receipt.ok for receipt in receipts] == [True, False, True]
+    assert [receipt.total for receipt in receipts] == [1000, 0.0, 500]
+    assert pixel.quantity == 0
+    assert not pixel.is_active()
+
+
+def test_journaled_commit_and_timings(store):
+    macbook = store.products[0]
+    journal = []
+    commit_stage = make_commit_stage(verbose=False, journal=journal)
+    pipeline = OrderPipeline([parse_stage, validate_stage, price_stage, reserve_stage,
+                              commit_stage, receipt_stage], batch_size=2)
+    receipts = list(pipeline.run([(macbook, 1)] for _ in range(5)))
+    assert len(receipts) == 5
+    assert journal == [[("MacBook", 1, 1450.0)]] * 5
+    assert set(pipeline.timings) == {"parse_stage", "validate_stage", "price_stage",
+                                     "reserve_stage", "commit_stage", "receipt_stage"}
+
+
+def test_summary_reports_stock_left_after_each_line(capsys):
+    macbook = Product("MacBook", price=1450, quantity=2)
+    Store([macbook]).order([(macbook, 1), (macbook, 1)])
+    out = capsys.readouterr().out
+    assert out.index("Remaining quantity: 1") < out.index("Remaining quantity: 0")
@@ -0,0 +1,43 @@
+import pytest
+from product import Product
+from store import Store
+from changefeed import ChangeFeed
+from popularity import CountMinSketch, PopularityTracker
+
+
+def test_sketch_never_undercounts():
+    sketch = CountMinSketch(width=16, depth=3)
+    for index in range(100):
+        sketch.add(f"P{index}", index)
+    assert all(sketch.estimate(f"P{index}") >= index for index in range(100))
+
+
+def test_store_lists_best_sellers_first(clock):
+    products = [Product(f"P{index}", price=10, quantity=100) for index in range(5)]
+    store = Store(products)
+    feed = ChangeFeed(keep_log=False)
+    store.attach_feed(feed)
+    store.popularity = PopularityTracker(feed, k=2, clock=clock)
+    store.order([(products[3], 5)])
+    store.order([(products[1], 2)])
+    store.order([(products[4], 1)])
+    assert [product.name for product in store.get_all_products()] == ["P3", "P1", "P0", "P2", "P4"]
+
+
+def test_old_sales_decay(clock):
+    tracker = PopularityTracker(k=1, half_life=10, clock=clock)
+    tracker.record("old", 10)
+    clock.now = 40
+    tracker.record("new", 2)
+    assert tracker.hottest() == ["new"]
+    assert tracker.score("old") == pytest.approx(10 / 16)
+
+
+def test_rescale_keeps_ranking(clock):
+    tracker = PopularityTracker(k=2, half_life=1, clock=clock)
+    tracker.record("a", 1)
+    clock.now = 100
+    tracker.record("b", 3)
+    tracker.record("a", 1)
+    assert tracker.hottest() == ["b", "a"]
+    assert tracker.score("b") == pytest.approx(3)
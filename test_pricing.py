@@ -0,0 +1,80 @@
+import pytest
+from product import Product
+from promotion import SecondHalfPrice, ThirdOneFree, PercentDiscount
+from pricing import PromotionResolver
+
+
+@pytest.fixture
+def product():
+    return Product("MacBook", price=100, quantity=100)
+
+
+def test_best_exclusive_promotion_wins_regardless_of_order(product):
+    product.set_promotion(ThirdOneFree("Third One Free!"))
+    product.set_promotion(PercentDiscount("10% off!", percent=10))
+    # 3 items: third free = 200, 10% off = 270
+    assert product.price_for(3) == (200, 100)
+    assert product.buy(3) == 200
+
+
+def test_stackable_promotions_combine(product):
+    product.set_promotion(PercentDiscount("10% off!", percent=10, stackable=True))
+    product.set_promotion(PercentDiscount("Members 20% off!", percent=20, stackable=True))
+    product.set_promotion(SecondHalfPrice("Second Half price!"))
+    total, discount = product.price_for(1)
+    assert total == pytest.approx(72)
+    assert discount == pytest.approx(28)
+
+
+def test_single_promotion_prices_exactly_on_the_product():
+    windows = Product("Windows License", price=125, quantity=10)
+    promotion = PercentDiscount("30% off!", percent=30)
+    windows.set_promotion(promotion)
+    for quantity in range(1, 10):
+        assert windows.price_for(quantity)[0] == promotion.apply_promotion(windows, quantity)
+    assert windows.buy(3) == 262.5
+
+
+def test_resolution_is_memoized_per_promotion_set():
+    resolver = PromotionResolver(max_entries=2)
+    promotions = [ThirdOneFree("Third One Free!"), SecondHalfPrice("Second Half price!")]
+    first = resolver.resolve(promotions, 6)
+    assert resolver.resolve(list(promotions), 6) is first
+    assert first == (4, (promotions[0],))
+    resolver.resolve(promotions, 1)
+    resolver.resolve(promotions, 2)
+    assert resolver.resolve(promotions, 6) is not first
+
+
+def test_no_promotion(product):
+    assert product.price_for(2) == (200, 0)
+
+
+def test_shared_resolver_is_thread_safe():
+    import threading
+    resolver = PromotionResolver(max_entries=8)
+    promotions = [ThirdOneFree("Third One Free!"), SecondHalfPrice("Second Half price!")]
+    errors = []
+
+    def worker(offset):
+        try:
+            for quantity in range(1, 2000):
+                resolver.resolve(promotions, (quantity * 7 + offset) % 50 + 1)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_receipt_names_only_the_applied_promotion(product, capsys):
+    product.set_promotion(ThirdOneFree("Third One Free!"))
+    product.set_promotion(PercentDiscount("10% off!", percent=10))
+    product.buy(3)
+    assert "Promotion: Third One Free! applied" in capsys.readouterr().out
+    product.buy(1)
+    assert "Promotion: 10% off! applied" in capsys.readouterr().out
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from product import Product
+from store import Store
+from profiling import SamplingProfiler, profiled
+
+
+def busy_orders():
+    product = Product("MacBook", price=1450, quantity=10 ** 9)
+    store = Store([product])
+    for _ in store.order_stream([(product, 1)] for _ in range(20000)):
+        pass
+
+
+def spin(seconds=0.2):
+    # Works in its own frame, so the innermost frame of its samples is always spin
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiled_writes_collapsed_stacks(tmp_path, capsys):
+    output = tmp_path / "orders.collapsed"
+    with profiled(str(output), interval=0.001) as profiler:
+        busy_orders()
+    lines = output.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "test_profiling.py:busy_orders" in stack.split(";")
+    assert "self %" in capsys.readouterr().out
+    assert profiler.hotspots(3)
+
+
+def test_idle_samples_are_dropped():
+    with SamplingProfiler(interval=0.001, idle=("spin",)) as profiler:
+        spin()
+        busy_orders()
+    assert profiler.dropped > 0
+    assert profiler.samples
+    assert all(stack[-1] != "test_profiling.py:spin" for stack in profiler.samples)
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError, match="Interval must be greater than zero."):
+        SamplingProfiler(interval=0)
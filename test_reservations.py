@@ -0,0 +1,54 @@
+import pytest
+from product import Product
+from store import Store
+from timerwheel import TimerWheel
+
+
+@pytest.fixture
+def store(clock):
+    store = Store([Product("MacBook", price=1450, quantity=100)])
+    store.reservation_timers = TimerWheel(tick=1.0, slots=8, clock=clock)
+    return store
+
+
+def test_reserve_holds_stock_and_confirm_buys_it(store):
+    macbook = store.products[0]
+    reservation_id = store.reserve(macbook, 10)
+    assert macbook.quantity == 90
+    assert store.get_reserved_quantity(macbook) == 10
+    assert store.confirm(reservation_id) == 14500
+    assert macbook.quantity == 90
+    assert store.get_reserved_quantity(macbook) == 0
+
+
+def test_release_returns_stock(store):
+    macbook = store.products[0]
+    store.release(store.reserve(macbook, 10))
+    assert macbook.quantity == 100
+    with pytest.raises(Exception, match="has expired or does not exist"):
+        store.release(1)
+
+
+def test_reservation_expires(store, clock):
+    macbook = store.products[0]
+    short = store.reserve(macbook, 10, ttl=5)
+    # Longer than one revolution of the wheel
+    long = store.reserve(macbook, 20, ttl=30)
+    clock.now = 6
+    assert store.get_reserved_quantity(macbook) == 20
+    assert macbook.quantity == 80
+    with pytest.raises(Exception, match=f"Reservation {short} has expired or does not exist."):
+        store.confirm(short)
+    clock.now = 31
+    assert store.expire_reservations() == 1
+    assert macbook.quantity == 100
+    with pytest.raises(Exception):
+        store.confirm(long)
+
+
+def test_reserve_can_not_exceed_stock(store):
+    macbook = store.products[0]
+    store.reserve(macbook, 100)
+    assert macbook.is_active()
+    with pytest.raises(Exception, match=r"Insufficient stock\. Only 0\.0 units are available\."):
+        store.reserve(macbook, 1)
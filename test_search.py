@@ -0,0 +1,35 @@
+import pytest
+from product import Product
+from store import Store
+
+
+@pytest.fixture
+def store():
+    return Store([Product("MacBook Air M2", price=1450, quantity=100),
+                  Product("Google Pixel 7", price=500, quantity=250),
+                  Product("Google Pixel 8 Pro", price=900, quantity=10),
+                  Product("Bose QuietComfort Earbuds", price=250, quantity=500)])
+
+
+def test_prefix_search(store):
+    assert [product.name for product in store.search("pix")] == ["Google Pixel 7", "Google Pixel 8 Pro"]
+    assert [product.name for product in store.search("MAC")] == ["MacBook Air M2"]
+    assert store.search("") == []
+    assert store.search("iphone") == []
+
+
+def test_multi_token_search(store):
+    assert [product.name for product in store.search("goo pro")] == ["Google Pixel 8 Pro"]
+    assert [product.name for product in store.search("pixel 7")] == ["Google Pixel 7"]
+
+
+def test_index_follows_add_and_remove(store):
+    store.remove_product(store.search("pixel 7")[0])
+    assert [product.name for product in store.search("google")] == ["Google Pixel 8 Pro"]
+    store.add_product(Product("Pixel Watch", price=300, quantity=5))
+    assert [product.name for product in store.search("pix")] == ["Google Pixel 8 Pro", "Pixel Watch"]
+
+
+def test_inactive_products_are_not_found(store):
+    store.search("bose")[0].deactivate()
+    assert store.search("bose") == []
@@ -0,0 +1,68 @@
+import pytest
+from product import Product, NonStockedProduct
+from store import Store
+from changefeed import ChangeFeed
+from watch import ThresholdWatch
+
+
+@pytest.fixture
+def feed():
+    return ChangeFeed(keep_log=False)
+
+
+@pytest.fixture
+def store(feed):
+    store = Store([Product("MacBook", price=1450, quantity=100),
+                   Product("Google Pixel 7", price=500, quantity=250),
+                   NonStockedProduct("Windows License", price=125)])
+    store.attach_feed(feed)
+    return store
+
+
+def test_global_threshold_reports_low_products(store, feed):
+    alerts = []
+    watch = ThresholdWatch(store, feed, default_threshold=95,
+                           on_low=lambda product, quantity: alerts.append((product.name, quantity)))
+    assert watch.below() == []
+    store.find_product("MacBook").buy(5)
+    assert [product.name for product in watch.below()] == ["MacBook"]
+    assert alerts == [("MacBook", 95)]
+    store.find_product("MacBook").buy(1)
+    assert len(alerts) == 1
+
+
+def test_per_product_threshold_and_restock(store, feed):
+    watch = ThresholdWatch(store, feed)
+    watch.set_threshold("Google Pixel 7", 240)
+    pixel = store.find_product("Google Pixel 7")
+    pixel.buy(10)
+    assert watch.is_below("Google Pixel 7")
+    pixel.set_quantity(300)
+    assert not watch.is_below("Google Pixel 7")
+    assert not watch.is_below("MacBook")
+
+
+def test_auto_deactivate(store, feed):
+    watch = ThresholdWatch(store, feed, auto_deactivate=True)
+    watch.set_threshold("MacBook", 10)
+    store.find_product("MacBook").buy(90)
+    assert not store.find_product("MacBook").is_active()
+
+
+def test_negative_threshold(store, feed):
+    watch = ThresholdWatch(store, feed)
+    with pytest.raises(ValueError, match="Threshold cannot be negative."):
+        watch.set_threshold("MacBook", -1)
+
+
+def test_find_product_follows_removal_of_duplicate_names():
+    # Duplicate names are only allowed without a feed
+    first = Product("MacBook", price=1450, quantity=100)
+    store = Store([first])
+    second = Product("MacBook", price=1000, quantity=5)
+    store.add_product(second)
+    assert store.find_product("MacBook") is first
+    store.remove_product(first)
+    assert store.find_product("MacBook") is second
+    store.remove_product(second)
+    assert store.find_product("MacBook") is None
@@ -0,0 +1,100 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class TimerWheel:
+    """
+    A hashed timer wheel for large numbers of deadlines.
+
+    The wheel has a fixed number of slots, each covering one tick. A timer goes into the slot
+    of its deadline tick; timers more than one revolution away stay in their slot until the
+    wheel comes round to them again. Scheduling and cancelling are O(1), and advancing the
+    wheel only visits the slots of the ticks that passed, so maintaining millions of timers
+    costs O(1) amortized per timer.
+    """
+
+    def __init__(self, tick=1.0, slots=512, clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize a TimerWheel.
+
+        Args:
+            tick (float): The resolution of the wheel in seconds.
+            slots (int): The number of slots in one revolution.
+            clock (Callable[[], float]): The time source. Defaults to `time.monotonic`.
+
+        Raises:
+            ValueError: If tick or slots is not positive.
+        """
+        if tick <= 0:
+            raise ValueError("Tick must be greater than zero.")
+        if slots <= 0:
+            raise ValueError("Slots must be greater than zero.")
+        self.clock = clock or time.monotonic
+        self._tick = tick
+        self._slots: List[Dict] = [{} for _ in range(slots)]
+        self._deadlines: Dict = {}  # key -> deadline tick, for O(1) cancel
+        self._current = self._to_tick(self.clock())
+
+
+    def __len__(self):
+        return len(self._deadlines)
+
+
+    def _to_tick(self, when) -> int:
+        return int(when // self._tick)
+
+
+    def schedule(self, key, delay):
+        """
+        Schedule a timer, replacing any timer with the same key.
+
+        Args:
+            key: A hashable key identifying the timer.
+            delay (float): Seconds from now until the timer expires.
+        """
+        self.cancel(key)
+        # A timer always expires at least one tick after it was scheduled
+        deadline = max(self._to_tick(self.clock() + delay), self._current + 1)
+        self._deadlines[key] = deadline
+        self._slots[deadline % len(self._slots)][key] = deadline
+
+
+    def cancel(self, key) -> bool:
+        """
+        Cancel a timer.
+
+        Args:
+            key: The key of the timer.
+
+        Returns:
+            bool: True if the timer was pending.
+        """
+        deadline = self._deadlines.pop(key, None)
+        if deadline is None:
+            return False
+        del self._slots[deadline % len(self._slots)][key]
+        return True
+
+
+    def advance(self) -> List:
+        """
+        Move the wheel up to the current time and collect the expired timers.
+
+        Returns:
+            List: The keys of the expired timers.
+        """
+        now = self._to_tick(self.clock())
+        expired = []
+        # Visiting more than one revolution of slots would only revisit the same slots
+        last = min(now, self._current + len(self._slots))
+        for tick in range(self._current + 1, last + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+            due = [key for key, deadline in slot.items() if deadline <= now]
+            for key in due:
+                del slot[key]
+                del self._deadlines[key]
+            expired.extend(due)
+        self._current = max(self._current, now)
+        return expired
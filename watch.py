@@ -0,0 +1,130 @@
+from typing import Callable, Dict, List, Optional
+
+
+class ThresholdWatch:
+    """
+    Watches product stock against reorder thresholds using a store's ChangeFeed.
+
+    A threshold can be set per product or globally through `default_threshold`. The watch
+    keeps the latest known quantity of every product and an index of the products that are
+    at or below their threshold, updated on each quantity change. Products are looked up
+    through the store's name index, so every change costs O(1) and `below()` is answered
+    in time proportional to the number of low products, without scanning the store.
+    """
+
+    def __init__(self, store, feed, default_threshold=None,
+                 on_low: Optional[Callable] = None, auto_deactivate=False):
+        """
+        Initialize the watch and subscribe it to the feed.
+
+        Args:
+            store (Store): The store whose products are watched. It must publish to `feed`.
+            feed (ChangeFeed): The feed attached to the store.
+            default_threshold (float): Threshold for products without their own, or None for no global threshold.
+            on_low (Callable[[Product, float], None]): Called with the product and its quantity when
+                                                       it drops to or below its threshold.
+            auto_deactivate (bool): Deactivate products as soon as they reach their threshold.
+        """
+        self._store = store
+        self._default = default_threshold
+        self._thresholds: Dict[str, float] = {}
+        self._quantities: Dict[str, float] = {}
+        self._below: Dict[str, None] = {}  # Insertion ordered set of low product names
+        self._on_low = on_low
+        self._auto_deactivate = auto_deactivate
+        self._unsubscribe = feed.subscribe(self._on_event)
+
+
+    def set_threshold(self, name, threshold):
+        """
+        Set the threshold of a single product.
+
+        Args:
+            name (str): The product name.
+            threshold (float): The reorder point. Stock at or below it is reported as low.
+
+        Raises:
+            ValueError: If the threshold is negative.
+        """
+        if threshold < 0:
+            raise ValueError("Threshold cannot be negative.")
+        self._thresholds[name] = threshold
+        self._update(name)
+
+
+    def clear_threshold(self, name):
+        """
+        Remove the threshold of a single product, falling back to the global threshold.
+
+        Args:
+            name (str): The product name.
+        """
+        self._thresholds.pop(name, None)
+        self._update(name)
+
+
+    def threshold(self, name) -> Optional[float]:
+        """
+        Returns:
+            float or None: The threshold that applies to the product, or None if it is not watched.
+        """
+        return self._thresholds.get(name, self._default)
+
+
+    def is_below(self, name) -> bool:
+        """
+        Returns:
+            bool: True if the product is at or below its threshold.
+        """
+        return name in self._below
+
+
+    def below(self) -> List:
+        """
+        Returns all products that are at or below their threshold.
+
+        Returns:
+            List[Product]: The low products, in the order they became low.
+        """
+        products = (self._store.find_product(name) for name in self._below)
+        return [product for product in products if product is not None]
+
+
+    def close(self):
+        """
+        Stop watching the feed.
+        """
+        self._unsubscribe()
+
+
+    def _on_event(self, event):
+        if event.field == "added":
+            self._quantities[event.name] = event.value["quantity"]
+        elif event.field == "quantity":
+            self._quantities[event.name] = event.value
+        elif event.field == "removed":
+            self._quantities.pop(event.name, None)
+            self._below.pop(event.name, None)
+            return
+        else:
+            return
+        self._update(event.name)
+
+
+    def _update(self, name):
+        quantity = self._quantities.get(name)
+        threshold = self.threshold(name)
+        low = quantity is not None and threshold is not None and quantity <= threshold
+        if not low:
+            self._below.pop(name, None)
+            return
+        if name in self._below:
+            return
+        self._below[name] = None
+        product = self._store.find_product(name)
+        if product is None:
+            return
+        if self._auto_deactivate and product.is_active():
+            product.deactivate()
+        if self._on_low is not None:
+            self._on_low(product, quantity)